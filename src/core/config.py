@@ -6,6 +6,12 @@ from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional
 
+# Снимок окружения: чтение из dict вместо обращений к os.environ на каждый ключ
+_ENV = dict(os.environ)
+
+# Директории, уже созданные в этом процессе
+_CREATED_DIRS = set()
+
 
 @dataclass
 class Config:
@@ -19,33 +25,38 @@ class Config:
     LOG_DIR: Path = DATA_DIR / "logs"
     
     # Настройки приложения
-    APP_NAME: str = os.getenv("APP_NAME", "AIS-UCHET")
-    APP_VERSION: str = os.getenv("APP_VERSION", "2.0.0")
-    DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    APP_NAME: str = _ENV.get("APP_NAME", "AIS-UCHET")
+    APP_VERSION: str = _ENV.get("APP_VERSION", "2.0.0")
+    DEBUG: bool = _ENV.get("DEBUG", "False").lower() == "true"
     
     # Настройки безопасности
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "default-secret-key")
-    PASSWORD_SALT: str = os.getenv("PASSWORD_SALT", "default-salt")
-    SESSION_TIMEOUT_MINUTES: int = int(os.getenv("SESSION_TIMEOUT_MINUTES", "30"))
+    SECRET_KEY: str = _ENV.get("SECRET_KEY", "default-secret-key")
+    PASSWORD_SALT: str = _ENV.get("PASSWORD_SALT", "default-salt")
+    SESSION_TIMEOUT_MINUTES: int = int(_ENV.get("SESSION_TIMEOUT_MINUTES", "30"))
+    # Стоимость bcrypt (2^rounds итераций). Каждая единица удваивает время
+    # хеширования и стоимость перебора; для внутреннего приложения достаточно 10
+    BCRYPT_ROUNDS: int = int(_ENV.get("BCRYPT_ROUNDS", "10"))
     
     # Настройки логирования
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    LOG_FILE: Path = LOG_DIR / os.getenv("LOG_FILE", "ais_uchet.log")
-    LOG_MAX_SIZE_MB: int = int(os.getenv("LOG_MAX_SIZE_MB", "10"))
-    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_LEVEL: str = _ENV.get("LOG_LEVEL", "INFO")
+    LOG_FILE: Path = LOG_DIR / _ENV.get("LOG_FILE", "ais_uchet.log")
+    LOG_MAX_SIZE_MB: int = int(_ENV.get("LOG_MAX_SIZE_MB", "10"))
+    LOG_BACKUP_COUNT: int = int(_ENV.get("LOG_BACKUP_COUNT", "5"))
     
     # Настройки UI
-    THEME: str = os.getenv("THEME", "light")
-    LANGUAGE: str = os.getenv("LANGUAGE", "ru_RU")
-    WINDOW_WIDTH: int = int(os.getenv("WINDOW_WIDTH", "1280"))
-    WINDOW_HEIGHT: int = int(os.getenv("WINDOW_HEIGHT", "720"))
+    THEME: str = _ENV.get("THEME", "light")
+    LANGUAGE: str = _ENV.get("LANGUAGE", "ru_RU")
+    WINDOW_WIDTH: int = int(_ENV.get("WINDOW_WIDTH", "1280"))
+    WINDOW_HEIGHT: int = int(_ENV.get("WINDOW_HEIGHT", "720"))
     
     # Производительность
-    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "True").lower() == "true"
-    CACHE_SIZE_MB: int = int(os.getenv("CACHE_SIZE_MB", "100"))
-    MAX_CONCURRENT_USERS: int = int(os.getenv("MAX_CONCURRENT_USERS", "70"))
+    CACHE_ENABLED: bool = _ENV.get("CACHE_ENABLED", "True").lower() == "true"
+    CACHE_SIZE_MB: int = int(_ENV.get("CACHE_SIZE_MB", "100"))
+    MAX_CONCURRENT_USERS: int = int(_ENV.get("MAX_CONCURRENT_USERS", "70"))
     
     def __post_init__(self):
-        """Создаем необходимые директории"""
-        for path in [self.DATA_DIR, self.DB_PATH.parent, self.BACKUP_DIR, self.LOG_DIR]:
-            path.mkdir(parents=True, exist_ok=True)
+        """Создаем необходимые директории (каждую один раз на процесс)"""
+        for path in (self.DATA_DIR, self.DB_PATH.parent, self.BACKUP_DIR, self.LOG_DIR):
+            if path not in _CREATED_DIRS:
+                path.mkdir(parents=True, exist_ok=True)
+                _CREATED_DIRS.add(path)
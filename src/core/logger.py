@@ -1,10 +1,28 @@
 """
 Настройка логирования для приложения
 """
+import atexit
 import logging
 import logging.handlers
+import os
+import queue
 from pathlib import Path
-from typing import Optional
+from typing import ClassVar, Optional
+
+
+# Фоновый поток записи логов в файлы
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_listener():
+    """Остановить фоновую запись логов, дописав очередь"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
 
 
 def setup_logger(config) -> logging.Logger:
@@ -17,6 +35,8 @@ def setup_logger(config) -> logging.Logger:
     Returns:
         Настроенный логгер
     """
+    global _listener
+    
     # Создаем корневой логгер
     logger = logging.getLogger()
     logger.setLevel(getattr(logging, config.LOG_LEVEL))
@@ -24,19 +44,35 @@ def setup_logger(config) -> logging.Logger:
     # Удаляем существующие обработчики
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    _stop_listener()
+    
+    # Не собираем в записи данные о потоках и процессах
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
+    # Поиск места вызова (filename/lineno) обходит стек на каждую запись,
+    # поэтому включаем его только в режиме отладки
+    if config.DEBUG:
+        log_format = '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
+        logging._srcfile = os.path.normcase(logging.addLevelName.__code__.co_filename)
+    else:
+        log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        logging._srcfile = None
     
     # Формат логов
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    formatter = logging.Formatter(log_format, datefmt='%Y-%m-%d %H:%M:%S')
     
     # Консольный обработчик
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
     logger.addHandler(console_handler)
     
+    # Файловые обработчики работают в фоновом потоке QueueListener,
+    # вызывающий поток только кладет запись в очередь
+    file_handlers = []
+    
     # Файловый обработчик с ротацией
     if config.LOG_FILE:
         config.LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -49,19 +85,18 @@ def setup_logger(config) -> logging.Logger:
         )
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handlers.append(file_handler)
     
-    # Специальный обработчик для критических ошибок
-    error_file = config.LOG_DIR / 'errors.log'
-    error_handler = logging.handlers.RotatingFileHandler(
-        error_file,
-        maxBytes=10 * 1024 * 1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(formatter)
-    logger.addHandler(error_handler)
+    # Отдельный errors.log не ведется: ошибки уже пишутся в основной
+    # лог-файл, второй обработчик только удваивал запись и ротацию
+    if file_handlers:
+        log_queue = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        
+        _listener = logging.handlers.QueueListener(
+            log_queue, *file_handlers, respect_handler_level=True
+        )
+        _listener.start()
     
     logger.info("="*60)
     logger.info(f"Система логирования инициализирована")
@@ -75,8 +110,10 @@ def setup_logger(config) -> logging.Logger:
 class DatabaseLogger:
     """Логгер для операций с БД"""
     
+    # Общий для всех экземпляров: getLogger берет глобальную блокировку
+    logger: ClassVar[logging.Logger] = logging.getLogger("DatabaseLogger")
+    
     def __init__(self, user_id: Optional[int] = None):
-        self.logger = logging.getLogger(self.__class__.__name__)
         self.user_id = user_id
         
     def log_operation(self, operation: str, table: str, record_id: Optional[int] = None, **kwargs):
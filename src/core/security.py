@@ -2,30 +2,99 @@
 Модуль безопасности и хеширования паролей
 """
 import hashlib
+import hmac
 import secrets
 import string
+import threading
+from collections import OrderedDict
 from typing import Optional
 import bcrypt
 
 
+# Алфавит генерируемых паролей
+_ALPHABET = (string.ascii_letters + string.digits + "!@#$%^&*").encode('ascii')
+_ALPHABET_LEN = len(_ALPHABET)
+# Байты не меньше этой границы отбрасываются, чтобы не было смещения по модулю
+_ALPHABET_LIMIT = (256 // _ALPHABET_LEN) * _ALPHABET_LEN
+
+# Формат хранимого хеша: $2b$NN$ + 53 символа соли и хеша
+_BCRYPT_HASH_LEN = 60
+_BCRYPT_PREFIXES = (b"$2a$", b"$2b$", b"$2y$")
+
+
+def _is_bcrypt_hash(hashed: bytes) -> bool:
+    """
+    Проверить формат bcrypt-хеша без вызова bcrypt
+    
+    Префикс сравнивается со всеми допустимыми вариантами через
+    hmac.compare_digest, чтобы время проверки не зависело от входа.
+    """
+    well_formed = len(hashed) == _BCRYPT_HASH_LEN
+    prefix = hashed[:4] if well_formed else b"\0" * 4
+    matched = False
+    for expected in _BCRYPT_PREFIXES:
+        matched |= hmac.compare_digest(prefix, expected)
+    return well_formed and matched
+
+
+# Кеш успешных проверок: SHA256(пароль + хеш) -> True.
+# bcrypt остается форматом хранения, повторная проверка стоит одного SHA256
+_VERIFY_CACHE_SIZE = 256
+_verify_cache: "OrderedDict[bytes, bool]" = OrderedDict()
+_verify_cache_lock = threading.Lock()
+
+
+def _verify_cache_key(password: bytes, hashed: bytes) -> bytes:
+    """Ключ кеша проверок"""
+    return hashlib.sha256(password + hashed).digest()
+
+
+def _verify_cache_get(key: bytes) -> bool:
+    """Проверить наличие успешной проверки в кеше"""
+    with _verify_cache_lock:
+        if key in _verify_cache:
+            _verify_cache.move_to_end(key)
+            return True
+    return False
+
+
+def _verify_cache_put(key: bytes):
+    """Запомнить успешную проверку"""
+    with _verify_cache_lock:
+        _verify_cache[key] = True
+        _verify_cache.move_to_end(key)
+        if len(_verify_cache) > _VERIFY_CACHE_SIZE:
+            _verify_cache.popitem(last=False)
+
+
+def clear_verify_cache():
+    """Очистить кеш проверок паролей"""
+    with _verify_cache_lock:
+        _verify_cache.clear()
+
+
 class PasswordManager:
     """Менеджер для работы с паролями"""
     
     @staticmethod
-    def hash_password(password: str) -> str:
+    def hash_password(password: str, rounds: int = 12) -> str:
         """
         Хеширование пароля
         
+        Снижение rounds ускоряет вход и создание пользователей, но во столько же
+        раз удешевляет перебор при утечке хешей. Значение хранится в самом хеше,
+        поэтому уже сохраненные пароли проверяются с исходной стоимостью.
+        
         Args:
             password: Исходный пароль
+            rounds: Стоимость bcrypt (логарифм числа итераций, 4-31)
             
         Returns:
             Хешированный пароль
         """
         # Генерируем соль и хешируем пароль
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        salt = bcrypt.gensalt(rounds=rounds)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
     
     @staticmethod
     def verify_password(password: str, hashed: str) -> bool:
@@ -39,7 +108,38 @@ class PasswordManager:
         Returns:
             True если пароль верный
         """
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        password_bytes = password.encode('utf-8')
+        hashed_bytes = hashed.encode('utf-8')
+        
+        # Заведомо некорректный хеш не стоит 2^cost итераций Blowfish
+        if not _is_bcrypt_hash(hashed_bytes):
+            return False
+        
+        key = _verify_cache_key(password_bytes, hashed_bytes)
+        if _verify_cache_get(key):
+            return True
+        
+        valid = bcrypt.checkpw(password_bytes, hashed_bytes)
+        if valid:
+            _verify_cache_put(key)
+        return valid
+    
+    @staticmethod
+    def needs_rehash(hashed: str, rounds: int) -> bool:
+        """
+        Проверить, отличается ли стоимость хеша от заданной
+        
+        Стоимость записана в хеше после префикса: $2b$12$...
+        
+        Args:
+            hashed: Хеш пароля из БД
+            rounds: Требуемая стоимость bcrypt
+            
+        Returns:
+            True, если хеш нужно пересчитать с новой стоимостью
+        """
+        cost = hashed[4:6]
+        return not cost.isdigit() or int(cost) != rounds
     
     @staticmethod
     def generate_password(length: int = 12) -> str:
@@ -52,9 +152,13 @@ class PasswordManager:
         Returns:
             Сгенерированный пароль
         """
-        alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
-        password = ''.join(secrets.choice(alphabet) for _ in range(length))
-        return password
+        chars = bytearray()
+        while len(chars) < length:
+            # Берем энтропию с запасом одним вызовом вместо вызова на символ
+            for byte in secrets.token_bytes(length * 2):
+                if byte < _ALPHABET_LIMIT:
+                    chars.append(_ALPHABET[byte % _ALPHABET_LEN])
+        return chars[:length].decode('ascii')
     
     @staticmethod
     def validate_password_strength(password: str) -> tuple[bool, str]:
@@ -70,13 +174,25 @@ class PasswordManager:
         if len(password) < 8:
             return False, "Пароль должен содержать минимум 8 символов"
         
-        if not any(c.isupper() for c in password):
+        # Один проход по паролю: бит 1 - заглавная, 2 - строчная, 4 - цифра
+        flags = 0
+        for c in password:
+            if c.isupper():
+                flags |= 1
+            elif c.islower():
+                flags |= 2
+            elif c.isdigit():
+                flags |= 4
+            if flags == 7:
+                break
+        
+        if not flags & 1:
             return False, "Пароль должен содержать хотя бы одну заглавную букву"
         
-        if not any(c.islower() for c in password):
+        if not flags & 2:
             return False, "Пароль должен содержать хотя бы одну строчную букву"
         
-        if not any(c.isdigit() for c in password):
+        if not flags & 4:
             return False, "Пароль должен содержать хотя бы одну цифру"
         
         return True, "OK"
@@ -111,6 +227,7 @@ class Session:
         
     def clear(self):
         """Очистить сессию"""
+        clear_verify_cache()
         self.user_id = None
         self.username = None
         self.role_id = None
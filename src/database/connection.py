@@ -1,14 +1,14 @@
 """
 Модуль управления подключением к БД SQLite
 """
+import queue
 import sqlite3
 import threading
-from contextlib import contextmanager
+from contextlib import closing, contextmanager
 from pathlib import Path
-from typing import Optional, Any, List, Dict
+from typing import Optional, Any, List, Dict, Iterator
 import logging
 from datetime import datetime
-import shutil
 
 logger = logging.getLogger(__name__)
 
@@ -16,67 +16,183 @@ logger = logging.getLogger(__name__)
 class DatabaseConnection:
     """Класс для управления подключением к SQLite БД"""
     
-    def __init__(self, db_path: Path, check_same_thread: bool = False):
+    # Размер кеша подготовленных выражений на подключение
+    # (по умолчанию в sqlite3 - 128)
+    STATEMENT_CACHE_SIZE = 256
+    
+    # Число страниц, копируемых за один шаг резервного копирования.
+    # Между шагами блокировка БД снимается и другие подключения могут писать
+    BACKUP_PAGES_PER_STEP = 100
+    
+    # Максимальное число одновременно открытых подключений. Каждое держит
+    # собственный кеш страниц (cache_size), поэтому пул ограничивает память
+    POOL_SIZE = 8
+    
+    def __init__(self, db_path: Path):
         """
         Инициализация подключения к БД
         
         Args:
             db_path: Путь к файлу БД
-            check_same_thread: Проверка потоков (False для многопоточности)
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Локальное хранилище для подключений в разных потоках
+        # Пул подключений и список всех созданных подключений
+        self._pool: queue.Queue = queue.Queue(maxsize=self.POOL_SIZE)
+        self._connections: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        
+        # Подключение, закрепленное за потоком на время acquire()
         self._local = threading.local()
-        self._check_same_thread = check_same_thread
         
-        # Инициализируем БД при первом запуске
         if not self.db_path.exists():
             logger.info(f"Создание новой БД: {self.db_path}")
-            self._initialize_database()
         else:
             logger.info(f"Подключение к существующей БД: {self.db_path}")
             
-    @property
-    def connection(self) -> sqlite3.Connection:
-        """Получить подключение для текущего потока"""
-        if not hasattr(self._local, 'connection') or self._local.connection is None:
-            self._local.connection = sqlite3.connect(
-                str(self.db_path),
-                check_same_thread=self._check_same_thread,
-                isolation_level=None  # Автокоммит для простоты
-            )
-            # Включаем поддержку внешних ключей
-            self._local.connection.execute("PRAGMA foreign_keys = ON")
-            # Оптимизация для больших объемов данных
-            self._local.connection.execute("PRAGMA journal_mode = WAL")
-            self._local.connection.execute("PRAGMA synchronous = NORMAL")
-            self._local.connection.execute("PRAGMA cache_size = 10000")
-            self._local.connection.execute("PRAGMA temp_store = MEMORY")
-            
-            # Регистрируем адаптеры для datetime
-            self._local.connection.row_factory = sqlite3.Row
-            
-        return self._local.connection
+        # Новая БД создается с нуля, существующая - доводится до текущей схемы
+        self._initialize_database()
+            
+    def _create_connection(self) -> sqlite3.Connection:
+        """Открыть новое подключение для пула"""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            # Подключение из пула может использоваться разными потоками
+            check_same_thread=False,
+            isolation_level=None,  # Автокоммит для простоты
+            # Повторный запрос с тем же текстом берет уже
+            # скомпилированное выражение из кеша модуля sqlite3
+            cached_statements=self.STATEMENT_CACHE_SIZE
+        )
+        # Внешние ключи и оптимизация для больших объемов данных
+        # (одним вызовом). WAL + synchronous=NORMAL: запись последовательная,
+        # fsync только при checkpoint. Зафиксированные транзакции переживают
+        # сбой приложения и ОС, но последние из них могут потеряться
+        # при отключении питания - для данных учета и аудита это допустимо
+        conn.executescript("""
+            PRAGMA foreign_keys = ON;
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA wal_autocheckpoint = 1000;
+            PRAGMA cache_size = 10000;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA mmap_size = 268435456;
+        """)
+        
+        # Регистрируем адаптеры для datetime
+        conn.row_factory = sqlite3.Row
+        
+        return conn
+    
+    def _get_from_pool(self) -> sqlite3.Connection:
+        """Взять свободное подключение, при необходимости создав новое"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+            
+        with self._pool_lock:
+            if len(self._connections) < self.POOL_SIZE:
+                conn = self._create_connection()
+                self._connections.append(conn)
+                return conn
+                
+        # Все подключения заняты - ждем освобождения
+        return self._pool.get()
     
     @contextmanager
-    def transaction(self):
-        """Контекстный менеджер для транзакций"""
-        conn = self.connection
+    def acquire(self):
+        """
+        Взять подключение из пула на время блока
+        
+        Вложенные вызовы в том же потоке получают то же подключение,
+        поэтому execute() внутри transaction() работает в ее транзакции.
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            yield conn
+            return
+            
+        conn = self._get_from_pool()
+        self._local.connection = conn
         try:
-            conn.execute("BEGIN")
             yield conn
-            conn.execute("COMMIT")
-        except Exception as e:
-            conn.execute("ROLLBACK")
-            logger.error(f"Ошибка транзакции: {e}")
-            raise
+        finally:
+            self._local.connection = None
+            self.release(conn)
+            
+    def release(self, conn: sqlite3.Connection):
+        """Вернуть подключение в пул"""
+        if conn not in self._connections:
+            # Подключение было закрыто через close()/restore()
+            return
+        if conn.in_transaction:
+            # Незавершенная транзакция не должна достаться другому потоку
+            conn.rollback()
+        self._pool.put(conn)
+            
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Получить подключение, закрепленное за текущим потоком в acquire()"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            raise RuntimeError("Подключение не получено: используйте acquire()")
+        return conn
+    
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """
+        Контекстный менеджер для транзакций
+        
+        Вложенный transaction() в том же потоке не открывает новую
+        транзакцию: фиксация и откат выполняются внешним блоком.
+        
+        Args:
+            immediate: Захватить блокировку записи при открытии (BEGIN
+                IMMEDIATE). Нужно для чтения с последующей записью: в
+                отложенной транзакции запись после чтения сразу падает с
+                "database is locked", если другое подключение успело
+                зафиксировать изменения. При IMMEDIATE ожидание занятой
+                БД ограничено таймаутом подключения.
+        """
+        with self.acquire() as conn:
+            if conn.in_transaction:
+                # Вложенный блок выполняется в транзакции внешнего
+                yield conn
+                return
+                
+            try:
+                # Подключение работает в режиме автокоммита, поэтому BEGIN
+                # открываем явно; COMMIT/ROLLBACK выполняет сам sqlite3
+                # при выходе из with, без лишних execute
+                conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+                with conn:
+                    yield conn
+            except Exception as e:
+                logger.error(f"Ошибка транзакции: {e}")
+                raise
             
+    @staticmethod
+    def _execute(conn: sqlite3.Connection, query: str,
+                 params: Optional[tuple] = None) -> sqlite3.Cursor:
+        """Выполнить запрос на уже полученном подключении"""
+        cursor = conn.cursor()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        return cursor
+        
     def execute(self, query: str, params: Optional[tuple] = None) -> sqlite3.Cursor:
         """
         Выполнить SQL запрос
         
+        Вне acquire() подключение возвращается в пул сразу после запроса,
+        поэтому курсор закрывается: у него доступны lastrowid и rowcount,
+        а строки результата нужно читать через fetchone()/fetchall()/
+        iterate() или внутри acquire().
+        
         Args:
             query: SQL запрос
             params: Параметры запроса
@@ -84,36 +200,91 @@ class DatabaseConnection:
         Returns:
             Курсор с результатами
         """
+        pinned = getattr(self._local, 'connection', None) is not None
         try:
-            cursor = self.connection.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor
+            with self.acquire() as conn:
+                cursor = self._execute(conn, query, params)
+                if not pinned:
+                    cursor.close()
+                return cursor
         except sqlite3.Error as e:
             logger.error(f"Ошибка выполнения запроса: {e}\nQuery: {query}\nParams: {params}")
             raise
             
     def executemany(self, query: str, params: List[tuple]) -> sqlite3.Cursor:
-        """Выполнить множественный SQL запрос"""
+        """Выполнить множественный SQL запрос (курсор - как у execute())"""
+        pinned = getattr(self._local, 'connection', None) is not None
         try:
-            cursor = self.connection.cursor()
-            cursor.executemany(query, params)
-            return cursor
+            with self.acquire() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(query, params)
+                if not pinned:
+                    cursor.close()
+                return cursor
         except sqlite3.Error as e:
             logger.error(f"Ошибка выполнения множественного запроса: {e}")
             raise
             
     def fetchone(self, query: str, params: Optional[tuple] = None) -> Optional[sqlite3.Row]:
         """Получить одну запись"""
-        cursor = self.execute(query, params)
-        return cursor.fetchone()
+        # Читаем результат, пока подключение не вернулось в пул
+        with self.acquire() as conn:
+            return self._execute(conn, query, params).fetchone()
         
     def fetchall(self, query: str, params: Optional[tuple] = None) -> List[sqlite3.Row]:
         """Получить все записи"""
-        cursor = self.execute(query, params)
-        return cursor.fetchall()
+        with self.acquire() as conn:
+            return self._execute(conn, query, params).fetchall()
+        
+    def iterate(self, query: str, params: Optional[tuple] = None,
+                batch_size: int = 1000) -> Iterator[sqlite3.Row]:
+        """
+        Построчно выдать результат запроса, читая его пачками
+        
+        Запрос выполняется один раз; строки читаются из одного курсора
+        через fetchmany. Подключение занято генератором, пока тот не
+        исчерпан или не закрыт (close(), сборка мусора), поэтому брошенный
+        на середине генератор лучше закрывать явно. За потоком подключение
+        не закрепляется: другие запросы потока во время обхода идут через
+        свои подключения пула. Внутри acquire()/transaction() используется
+        уже полученное потоком подключение.
+        
+        Args:
+            query: SQL запрос
+            params: Параметры запроса
+            batch_size: Размер пачки
+        """
+        conn = getattr(self._local, 'connection', None)
+        owned = conn is None
+        if owned:
+            conn = self._get_from_pool()
+        try:
+            with closing(self._execute(conn, query, params)) as cursor:
+                cursor.arraysize = batch_size
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    yield from rows
+        finally:
+            if owned:
+                self.release(conn)
+        
+    def fetchall_tuples(self, query: str, params: Optional[tuple] = None) -> List[tuple]:
+        """
+        Получить все записи в виде кортежей
+        
+        Для массовых выборок: без обертки sqlite3.Row на каждую строку,
+        обращение к полям только по индексу.
+        """
+        with self.acquire() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            return cursor.fetchall()
         
     def backup(self, backup_dir: Path) -> Path:
         """
@@ -130,9 +301,12 @@ class DatabaseConnection:
         backup_path = backup_dir / f"backup_{timestamp}.db"
         
         try:
-            # Используем встроенный механизм backup SQLite
-            with sqlite3.connect(str(backup_path)) as backup_conn:
-                self.connection.backup(backup_conn)
+            # Используем встроенный механизм backup SQLite. Журнал в файле
+            # копии не нужен: он пишется один раз и целиком
+            with closing(sqlite3.connect(str(backup_path), isolation_level=None)) as backup_conn, \
+                    self.acquire() as conn:
+                backup_conn.execute("PRAGMA journal_mode = OFF")
+                conn.backup(backup_conn, pages=self.BACKUP_PAGES_PER_STEP)
             
             logger.info(f"Резервная копия создана: {backup_path}")
             return backup_path
@@ -147,13 +321,14 @@ class DatabaseConnection:
             raise FileNotFoundError(f"Файл резервной копии не найден: {backup_path}")
             
         try:
-            # Закрываем текущее подключение
-            if hasattr(self._local, 'connection'):
-                self._local.connection.close()
-                self._local.connection = None
+            # Закрываем все подключения пула
+            self.close()
                 
-            # Копируем файл резервной копии
-            shutil.copy2(backup_path, self.db_path)
+            # Переносим данные через backup API SQLite: запись идет через
+            # журнал БД, поэтому файлы -wal/-shm остаются согласованными
+            with closing(sqlite3.connect(str(backup_path))) as source, \
+                    closing(sqlite3.connect(str(self.db_path))) as target:
+                source.backup(target)
             logger.info(f"БД восстановлена из: {backup_path}")
             
         except Exception as e:
@@ -161,18 +336,24 @@ class DatabaseConnection:
             raise
             
     def _initialize_database(self):
-        """Инициализация новой БД"""
+        """Применить неприменённые миграции"""
         from .migrations import Migration
         migration = Migration(self)
         migration.run_all()
         
     def close(self):
-        """Закрыть подключение"""
-        if hasattr(self._local, 'connection') and self._local.connection:
-            self._local.connection.close()
-            self._local.connection = None
+        """Закрыть все подключения пула"""
+        with self._pool_lock:
+            connections, self._connections = self._connections, []
+            self._pool = queue.Queue(maxsize=self.POOL_SIZE)
+            
+        for conn in connections:
+            conn.close()
+            
+        if connections:
             logger.info("Подключение к БД закрыто")
             
     def __del__(self):
         """Деструктор"""
-        self.close()
+        if hasattr(self, '_connections'):
+            self.close()
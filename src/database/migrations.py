@@ -35,8 +35,8 @@ class Migration:
         
     def get_applied_migrations(self) -> List[int]:
         """Получить список примененных миграций"""
-        rows = self.db.fetchall("SELECT version FROM migrations ORDER BY version")
-        return [row['version'] for row in rows]
+        rows = self.db.fetchall_tuples("SELECT version FROM migrations ORDER BY version")
+        return [row[0] for row in rows]
         
     def apply_migration(self, version: int, name: str, sql: str):
         """
@@ -47,24 +47,28 @@ class Migration:
             name: Название миграции
             sql: SQL код миграции
         """
-        try:
-            with self.db.transaction():
-                # Выполняем SQL миграции
-                for statement in sql.split(';'):
-                    if statement.strip():
-                        self.db.execute(statement)
-                        
+        # Все шаги миграции выполняются на одном подключении из пула
+        with self.db.acquire() as conn:
+            try:
+                # Весь SQL миграции выполняется одним вызовом; границы выражений
+                # определяет сам SQLite. executescript фиксирует открытую
+                # транзакцию перед запуском, поэтому BEGIN входит в сам скрипт
+                conn.executescript(f"BEGIN;\n{sql}")
+                
                 # Записываем информацию о миграции
                 self.db.execute(
                     "INSERT INTO migrations (version, name) VALUES (?, ?)",
                     (version, name)
                 )
+                conn.execute("COMMIT")
+                    
+                logger.info(f"Миграция {version} '{name}' успешно применена")
                 
-            logger.info(f"Миграция {version} '{name}' успешно применена")
-            
-        except Exception as e:
-            logger.error(f"Ошибка применения миграции {version}: {e}")
-            raise
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                logger.error(f"Ошибка применения миграции {version}: {e}")
+                raise
             
     def run_all(self):
         """Выполнить все неприменённые миграции"""
@@ -84,6 +88,7 @@ class Migration:
             (1, "initial_schema", self._get_initial_schema()),
             (2, "add_indexes", self._get_indexes_migration()),
             (3, "initial_data", self._get_initial_data()),
+            (4, "add_last_login", self._get_last_login_migration()),
         ]
         return migrations
         
@@ -233,6 +238,12 @@ class Migration:
         CREATE INDEX IF NOT EXISTS idx_nomenclature_active ON nomenclature(is_active);
         """
         
+    def _get_last_login_migration(self) -> str:
+        """Миграция для хранения времени последнего входа"""
+        return """
+        ALTER TABLE users ADD COLUMN last_login_at DATETIME;
+        """
+        
     def _get_initial_data(self) -> str:
         """Начальные данные"""
         return """
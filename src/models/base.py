@@ -1,13 +1,72 @@
 """
 Базовый класс для всех моделей
 """
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Iterator
+from contextlib import closing, contextmanager
 from datetime import datetime
+from functools import lru_cache
 import json
 import logging
+import sqlite3
+
+try:
+    import orjson
+except ImportError:  # Необязательная зависимость
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# UPDATE/DELETE ... RETURNING доступны начиная с SQLite 3.35
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+def _dump_json(values: Dict[str, Any]) -> str:
+    """Сериализовать значения для журнала аудита (orjson, если установлен)"""
+    if orjson is not None:
+        # datetime отдаем в default=str, чтобы формат совпадал с json.dumps
+        return orjson.dumps(
+            values, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME
+        ).decode('utf-8')
+    return json.dumps(values, default=str)
+
+
+@lru_cache(maxsize=256)
+def _build_insert(table: str, columns: Tuple[str, ...]) -> str:
+    """Построить INSERT для набора колонок (кешируется)"""
+    placeholders = ', '.join('?' * len(columns))
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+@lru_cache(maxsize=256)
+def _build_update(table: str, columns: Tuple[str, ...], primary_key: str,
+                  returning: bool = False) -> str:
+    """
+    Построить UPDATE по первичному ключу для набора колонок (кешируется)
+    
+    При returning=True запрос возвращает первичный ключ измененной строки.
+    """
+    set_clause = ', '.join(f"{k} = ?" for k in columns)
+    query = f"UPDATE {table} SET {set_clause} WHERE {primary_key} = ?"
+    if returning:
+        query += f" RETURNING {primary_key}"
+    return query
+
+
+# json_each встроен в SQLite начиная с 3.38: список значений для IN
+# передается одним параметром, и текст запроса не зависит от длины списка
+_HAS_JSON_EACH = sqlite3.sqlite_version_info >= (3, 38, 0)
+
+# Типы значений, которые json_each возвращает без искажений
+_JSON_SCALARS = (str, int, float)
+
+# Колонки журнала аудита в порядке значений записи из буфера
+_AUDIT_COLUMNS = (
+    "user_id", "action", "table_name", "record_id",
+    "old_values", "new_values", "created_at",
+)
+
+# Запрос записи в журнал аудита (строится один раз)
+_AUDIT_SQL = _build_insert("audit_log", _AUDIT_COLUMNS)
+
 
 class BaseModel:
     """Базовый класс модели с CRUD операциями"""
@@ -16,6 +75,25 @@ class BaseModel:
     table_name: str = ""
     primary_key: str = "id"
     
+    # Размер буфера аудита, при котором записи сбрасываются в БД
+    # внутри audit_batch()
+    audit_buffer_size: int = 100
+    
+    # Запросы наследника, строятся при объявлении класса
+    _READ_SQL: str = ""
+    _DELETE_SQL: str = ""
+    _DELETE_RETURNING_SQL: str = ""
+    
+    def __init_subclass__(cls, **kwargs):
+        """Подготовить SQL наследника один раз при объявлении класса"""
+        super().__init_subclass__(**kwargs)
+        if not cls.table_name:
+            return
+            
+        cls._READ_SQL = f"SELECT * FROM {cls.table_name} WHERE {cls.primary_key} = ?"
+        cls._DELETE_SQL = f"DELETE FROM {cls.table_name} WHERE {cls.primary_key} = ?"
+        cls._DELETE_RETURNING_SQL = f"{cls._DELETE_SQL} RETURNING *"
+    
     def __init__(self, db_connection, audit_user_id: Optional[int] = None):
         """
         Инициализация модели
@@ -27,6 +105,13 @@ class BaseModel:
         self.db = db_connection
         self.audit_user_id = audit_user_id
         
+        # Накопленные записи журнала аудита и глубина вложенности audit_batch()
+        self._audit_buffer: List[tuple] = []
+        self._audit_batch_depth = 0
+        
+        # Время текущей операции (см. _time_scope)
+        self._current_now: Optional[datetime] = None
+        
         if not self.table_name:
             raise ValueError(f"table_name не определен для {self.__class__.__name__}")
             
@@ -40,34 +125,56 @@ class BaseModel:
         Returns:
             ID созданной записи или None при ошибке
         """
-        try:
-            # Добавляем временные метки
-            if 'created_at' not in data:
-                data['created_at'] = datetime.now()
-            if 'updated_at' not in data:
-                data['updated_at'] = datetime.now()
+        with self._time_scope() as now:
+            try:
+                # Добавляем временные метки (одно время для обеих)
+                data.setdefault('created_at', now)
+                data.setdefault('updated_at', now)
                 
-            # Добавляем пользователя
-            if self.audit_user_id and 'created_by' not in data:
-                data['created_by'] = self.audit_user_id
+                # Добавляем пользователя
+                if self.audit_user_id:
+                    data.setdefault('created_by', self.audit_user_id)
                 
-            columns = ', '.join(data.keys())
-            placeholders = ', '.join(['?' for _ in data])
-            query = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
+                # Колонки в отсортированном порядке: одинаковый набор полей дает
+                # одинаковый текст запроса и попадает в кеш выражений sqlite3
+                columns = tuple(sorted(data))
+                query = _build_insert(self.table_name, columns)
+                cursor = self.db.execute(query, tuple(data[c] for c in columns))
+                record_id = cursor.lastrowid
             
-            cursor = self.db.execute(query, tuple(data.values()))
-            record_id = cursor.lastrowid
+                # Аудит
+                self._audit_log('CREATE', record_id, None, data)
             
-            # Аудит
-            self._audit_log('CREATE', record_id, None, data)
+                logger.debug("Создана запись в %s с ID=%s", self.table_name, record_id)
+                return record_id
             
-            logger.debug(f"Создана запись в {self.table_name} с ID={record_id}")
-            return record_id
+            except Exception as e:
+                logger.error("Ошибка создания записи в %s: %s", self.table_name, e)
+                raise
             
-        except Exception as e:
-            logger.error(f"Ошибка создания записи в {self.table_name}: {e}")
-            raise
+    @contextmanager
+    def _time_scope(self):
+        """
+        Зафиксировать время на одну операцию
+        
+        Внутри блока _now() возвращает одно и то же значение, поэтому
+        временные метки записи и строки аудита совпадают. Вложенный блок
+        использует время внешнего.
+        """
+        if self._current_now is not None:
+            yield self._current_now
+            return
             
+        self._current_now = datetime.now()
+        try:
+            yield self._current_now
+        finally:
+            self._current_now = None
+            
+    def _now(self) -> datetime:
+        """Время текущей операции или текущее время вне операции"""
+        return self._current_now or datetime.now()
+        
     def read(self, record_id: int) -> Optional[Dict[str, Any]]:
         """
         Прочитать запись по ID
@@ -78,8 +185,7 @@ class BaseModel:
         Returns:
             Словарь с данными или None
         """
-        query = f"SELECT * FROM {self.table_name} WHERE {self.primary_key} = ?"
-        row = self.db.fetchone(query, (record_id,))
+        row = self.db.fetchone(self._READ_SQL, (record_id,))
         
         if row:
             return dict(row)
@@ -96,33 +202,49 @@ class BaseModel:
         Returns:
             True при успехе, False при ошибке
         """
-        try:
-            # Получаем старые данные для аудита
-            old_data = self.read(record_id)
-            if not old_data:
-                logger.warning(f"Запись {record_id} не найдена в {self.table_name}")
-                return False
-                
-            # Добавляем временную метку и пользователя
-            data['updated_at'] = datetime.now()
-            if self.audit_user_id and 'updated_by' not in data:
-                data['updated_by'] = self.audit_user_id
+        with self._time_scope():
+            try:
+                # Добавляем временную метку и пользователя
+                data['updated_at'] = self._now()
+                if self.audit_user_id and 'updated_by' not in data:
+                    data['updated_by'] = self.audit_user_id
                 
-            set_clause = ', '.join([f"{k} = ?" for k in data.keys()])
-            query = f"UPDATE {self.table_name} SET {set_clause} WHERE {self.primary_key} = ?"
-            values = list(data.values()) + [record_id]
+                columns = tuple(sorted(data))
+                values = tuple(data[c] for c in columns) + (record_id,)
             
-            self.db.execute(query, tuple(values))
-            
-            # Аудит
-            self._audit_log('UPDATE', record_id, old_data, data)
+                if self.audit_user_id or not _HAS_RETURNING:
+                    # Старые данные нужны для аудита: чтение и изменение
+                    # выполняются в одной транзакции. Блокировка записи
+                    # берется сразу, иначе запись другого подключения между
+                    # чтением и изменением приводит к "database is locked"
+                    query = _build_update(self.table_name, columns, self.primary_key)
+                    with self.db.transaction(immediate=True):
+                        old_data = self.read(record_id)
+                        if old_data:
+                            self.db.execute(query, values)
+                        
+                    if not old_data:
+                        logger.warning("Запись %s не найдена в %s", record_id, self.table_name)
+                        return False
+                    
+                    # Аудит
+                    self._audit_log('UPDATE', record_id, old_data, data)
+                else:
+                    # Без аудита достаточно одного запроса
+                    query = _build_update(
+                        self.table_name, columns, self.primary_key, returning=True
+                    )
+                    rows = self.db.fetchall(query, values)
+                    if not rows:
+                        logger.warning("Запись %s не найдена в %s", record_id, self.table_name)
+                        return False
             
-            logger.debug(f"Обновлена запись {record_id} в {self.table_name}")
-            return True
+                logger.debug("Обновлена запись %s в %s", record_id, self.table_name)
+                return True
             
-        except Exception as e:
-            logger.error(f"Ошибка обновления записи {record_id} в {self.table_name}: {e}")
-            return False
+            except Exception as e:
+                logger.error("Ошибка обновления записи %s в %s: %s", record_id, self.table_name, e)
+                return False
             
     def delete(self, record_id: int) -> bool:
         """
@@ -134,25 +256,31 @@ class BaseModel:
         Returns:
             True при успехе, False при ошибке
         """
-        try:
-            # Получаем данные для аудита
-            old_data = self.read(record_id)
-            if not old_data:
-                logger.warning(f"Запись {record_id} не найдена в {self.table_name}")
-                return False
-                
-            query = f"DELETE FROM {self.table_name} WHERE {self.primary_key} = ?"
-            self.db.execute(query, (record_id,))
+        with self._time_scope():
+            try:
+                if _HAS_RETURNING:
+                    # Удаленная строка возвращается тем же запросом
+                    rows = self.db.fetchall(self._DELETE_RETURNING_SQL, (record_id,))
+                    old_data = dict(rows[0]) if rows else None
+                else:
+                    # Получаем данные для аудита
+                    old_data = self.read(record_id)
+                    if old_data:
+                        self.db.execute(self._DELETE_SQL, (record_id,))
+                    
+                if not old_data:
+                    logger.warning("Запись %s не найдена в %s", record_id, self.table_name)
+                    return False
             
-            # Аудит
-            self._audit_log('DELETE', record_id, old_data, None)
+                # Аудит
+                self._audit_log('DELETE', record_id, old_data, None)
             
-            logger.debug(f"Удалена запись {record_id} из {self.table_name}")
-            return True
+                logger.debug("Удалена запись %s из %s", record_id, self.table_name)
+                return True
             
-        except Exception as e:
-            logger.error(f"Ошибка удаления записи {record_id} из {self.table_name}: {e}")
-            return False
+            except Exception as e:
+                logger.error("Ошибка удаления записи %s из %s: %s", record_id, self.table_name, e)
+                return False
             
     def find(self, conditions: Dict[str, Any] = None, 
              order_by: str = None, 
@@ -170,24 +298,41 @@ class BaseModel:
         Returns:
             Список записей
         """
-        query = f"SELECT * FROM {self.table_name}"
-        params = []
+        query, params = self._build_select(conditions, order_by, limit, offset)
+        return [dict(row) for row in self.db.fetchall(query, params)]
         
-        if conditions:
-            where_clauses = []
-            for key, value in conditions.items():
-                if value is None:
-                    where_clauses.append(f"{key} IS NULL")
-                elif isinstance(value, (list, tuple)):
-                    placeholders = ','.join(['?' for _ in value])
-                    where_clauses.append(f"{key} IN ({placeholders})")
-                    params.extend(value)
-                else:
-                    where_clauses.append(f"{key} = ?")
-                    params.append(value)
-                    
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
+    def iter_find(self, conditions: Dict[str, Any] = None, 
+                  order_by: str = None, 
+                  limit: int = None,
+                  offset: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Поиск записей по условиям с ленивой выдачей результата
+        
+        В отличие от find() не держит весь результат в памяти -
+        для обхода больших таблиц с фильтрацией на стороне Python.
+        Подключение к БД занято, пока генератор не исчерпан или не закрыт.
+        
+        Args:
+            conditions: Условия поиска
+            order_by: Поле для сортировки
+            limit: Ограничение количества
+            offset: Смещение
+            
+        Yields:
+            Записи в виде словарей
+        """
+        query, params = self._build_select(conditions, order_by, limit, offset)
+        # Закрытие этого генератора сразу освобождает подключение
+        with closing(self.db.iterate(query, params)) as rows:
+            for row in rows:
+                yield dict(row)
+            
+    def _build_select(self, conditions: Optional[Dict[str, Any]],
+                      order_by: Optional[str], limit: Optional[int],
+                      offset: Optional[int]) -> Tuple[str, tuple]:
+        """Построить SELECT для find()/iter_find()"""
+        where, params = self._build_where(conditions)
+        query = f"SELECT * FROM {self.table_name}{where}"
                 
         if order_by:
             query += f" ORDER BY {order_by}"
@@ -197,8 +342,7 @@ class BaseModel:
             if offset:
                 query += f" OFFSET {offset}"
                 
-        rows = self.db.fetchall(query, tuple(params))
-        return [dict(row) for row in rows]
+        return query, params
         
     def count(self, conditions: Dict[str, Any] = None) -> int:
         """
@@ -210,22 +354,9 @@ class BaseModel:
         Returns:
             Количество записей
         """
-        query = f"SELECT COUNT(*) as cnt FROM {self.table_name}"
-        params = []
-        
-        if conditions:
-            where_clauses = []
-            for key, value in conditions.items():
-                if value is None:
-                    where_clauses.append(f"{key} IS NULL")
-                else:
-                    where_clauses.append(f"{key} = ?")
-                    params.append(value)
-                    
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-                
-        row = self.db.fetchone(query, tuple(params))
+        where, params = self._build_where(conditions)
+        query = f"SELECT COUNT(*) as cnt FROM {self.table_name}{where}"
+        row = self.db.fetchone(query, params)
         return row['cnt'] if row else 0
         
     def exists(self, conditions: Dict[str, Any]) -> bool:
@@ -238,13 +369,54 @@ class BaseModel:
         Returns:
             True если запись существует
         """
-        return self.count(conditions) > 0
+        # Поиск останавливается на первой найденной строке
+        where, params = self._build_where(conditions)
+        query = f"SELECT 1 FROM {self.table_name}{where} LIMIT 1"
+        return self.db.fetchone(query, params) is not None
+        
+    @staticmethod
+    def _build_where(conditions: Optional[Dict[str, Any]]) -> Tuple[str, tuple]:
+        """
+        Построить условие WHERE по словарю условий
+        
+        Args:
+            conditions: Условия (None - IS NULL, список - IN, иначе равенство)
+            
+        Returns:
+            (фрагмент SQL с ведущим пробелом или пустая строка, параметры)
+        """
+        if not conditions:
+            return "", ()
+            
+        where_clauses = []
+        params = []
+        # Порядок условий не должен влиять на текст запроса
+        for key, value in sorted(conditions.items()):
+            if value is None:
+                where_clauses.append(f"{key} IS NULL")
+            elif isinstance(value, (list, tuple)):
+                if _HAS_JSON_EACH and all(isinstance(v, _JSON_SCALARS) for v in value):
+                    where_clauses.append(f"{key} IN (SELECT value FROM json_each(?))")
+                    params.append(json.dumps(list(value)))
+                else:
+                    placeholders = ','.join(['?' for _ in value])
+                    where_clauses.append(f"{key} IN ({placeholders})")
+                    params.extend(value)
+            else:
+                where_clauses.append(f"{key} = ?")
+                params.append(value)
+                
+        return " WHERE " + " AND ".join(where_clauses), tuple(params)
         
     def _audit_log(self, action: str, record_id: Optional[int],
                    old_values: Optional[Dict], new_values: Optional[Dict]):
         """
         Запись в журнал аудита
         
+        Вне audit_batch() запись сразу попадает в БД; внутри - копится
+        в буфере до конца блока или до заполнения буфера. Если переданы
+        и старые, и новые значения, сохраняются только изменившиеся поля.
+        
         Args:
             action: Тип действия
             record_id: ID записи
@@ -254,22 +426,67 @@ class BaseModel:
         if not self.audit_user_id:
             return
             
-        try:
-            audit_data = {
-                'user_id': self.audit_user_id,
-                'action': action,
-                'table_name': self.table_name,
-                'record_id': record_id,
-                'old_values': json.dumps(old_values, default=str) if old_values else None,
-                'new_values': json.dumps(new_values, default=str) if new_values else None,
-                'created_at': datetime.now()
+        if old_values and new_values:
+            new_values = {
+                k: v for k, v in new_values.items()
+                if k not in old_values or old_values[k] != v
             }
+            old_values = {k: old_values[k] for k in new_values if k in old_values}
+            
+        try:
+            self._audit_buffer.append((
+                self.audit_user_id,
+                action,
+                self.table_name,
+                record_id,
+                _dump_json(old_values) if old_values else None,
+                _dump_json(new_values) if new_values else None,
+                self._now()
+            ))
+        except Exception as e:
+            logger.error("Ошибка записи в журнал аудита: %s", e)
+            return
             
-            columns = ', '.join(audit_data.keys())
-            placeholders = ', '.join(['?' for _ in audit_data])
-            query = f"INSERT INTO audit_log ({columns}) VALUES ({placeholders})"
+        if (not self._audit_batch_depth
+                or len(self._audit_buffer) >= self.audit_buffer_size):
+            self.flush_audit()
+            
+    @contextmanager
+    def audit_batch(self):
+        """
+        Выполнить группу операций в одной транзакции с общей записью аудита
+        
+        Записи аудита операций блока копятся и записываются одним
+        executemany перед фиксацией транзакции. При ошибке откатываются
+        и данные, и накопленный аудит. Транзакция открывается с блокировкой
+        записи: вложенные update() выполняют в ней чтение и запись.
+        
+        Пример:
+            with model.audit_batch():
+                for row in rows:
+                    model.create(row)
+        """
+        self._audit_batch_depth += 1
+        try:
+            with self.db.transaction(immediate=True):
+                yield self
+                if self._audit_batch_depth == 1:
+                    self.flush_audit()
+        except Exception:
+            if self._audit_batch_depth == 1:
+                self._audit_buffer.clear()
+            raise
+        finally:
+            self._audit_batch_depth -= 1
             
-            self.db.execute(query, tuple(audit_data.values()))
+    def flush_audit(self):
+        """Записать накопленные записи аудита одним executemany"""
+        if not self._audit_buffer:
+            return
             
+        try:
+            self.db.executemany(_AUDIT_SQL, self._audit_buffer)
         except Exception as e:
-            logger.error(f"Ошибка записи в журнал аудита: {e}")
+            logger.error("Ошибка записи в журнал аудита: %s", e)
+        finally:
+            self._audit_buffer.clear()
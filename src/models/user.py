@@ -1,11 +1,14 @@
 """
 Модель пользователя и ролей
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import logging
+import sqlite3
+import threading
 
 from .base import BaseModel
+from ..core.config import Config
 from ..core.security import PasswordManager
 
 logger = logging.getLogger(__name__)
@@ -16,26 +19,53 @@ class Role(BaseModel):
     
     table_name = "roles"
     
+    # Кеш прав ролей: (путь к БД, ID роли) -> права
+    _permissions_cache: Dict[Tuple[str, int], Dict[str, bool]] = {}
+    
     def get_permissions(self, role_id: int) -> Dict[str, bool]:
         """
         Получить права роли
         
+        Права кешируются до изменения или удаления роли через эту модель.
+        
         Args:
             role_id: ID роли
             
         Returns:
             Словарь с правами
         """
-        role = self.read(role_id)
-        if role:
-            return {
-                'can_read': role.get('can_read', False),
-                'can_write': role.get('can_write', False),
-                'can_delete': role.get('can_delete', False),
-                'can_approve': role.get('can_approve', False),
-                'can_admin': role.get('can_admin', False)
-            }
-        return {}
+        key = (str(self.db.db_path), role_id)
+        permissions = self._permissions_cache.get(key)
+        if permissions is None:
+            permissions = self._fetch_permissions(role_id)
+            if permissions:
+                self._permissions_cache[key] = permissions
+        return dict(permissions)
+    
+    def _fetch_permissions(self, role_id: int) -> Dict[str, bool]:
+        """Прочитать права роли из БД"""
+        row = self.db.fetchone(
+            "SELECT can_read, can_write, can_delete, can_approve, can_admin "
+            "FROM roles WHERE id = ?",
+            (role_id,)
+        )
+        return dict(row) if row else {}
+    
+    def invalidate_permissions(self, role_id: int):
+        """Сбросить кеш прав роли"""
+        self._permissions_cache.pop((str(self.db.db_path), role_id), None)
+    
+    def update(self, record_id: int, data: Dict[str, Any]) -> bool:
+        """Обновить роль со сбросом кеша прав"""
+        success = super().update(record_id, data)
+        self.invalidate_permissions(record_id)
+        return success
+    
+    def delete(self, record_id: int) -> bool:
+        """Удалить роль со сбросом кеша прав"""
+        success = super().delete(record_id)
+        self.invalidate_permissions(record_id)
+        return success
     
     def get_all_roles(self) -> List[Dict[str, Any]]:
         """Получить все роли"""
@@ -47,6 +77,50 @@ class User(BaseModel):
     
     table_name = "users"
     
+    # Пользователь вместе с правами роли. Выбираются только нужные для
+    # сессии колонки; поиск - по уникальному индексу username и PK roles
+    _AUTH_QUERY = """
+        SELECT u.id, u.username, u.password_hash, u.full_name, u.position,
+               u.role_id, r.name as role_name, 
+               r.can_read, r.can_write, r.can_delete, 
+               r.can_approve, r.can_admin
+        FROM users u
+        JOIN roles r ON u.role_id = r.id
+        WHERE u.username = ? AND u.is_active = 1
+    """
+    
+    # Хеш для проверки пароля несуществующего пользователя (создается при
+    # первом обращении или в prepare_dummy_hash)
+    _DUMMY_HASH: Optional[str] = None
+    _dummy_lock = threading.Lock()
+    
+    @classmethod
+    def _dummy_hash(cls) -> str:
+        """
+        Получить хеш-заглушку
+        
+        Проверка пароля по заглушке выравнивает время ответа для
+        существующих и несуществующих имен пользователей. Заглушка имеет
+        стоимость Config.BCRYPT_ROUNDS, как и хеши новых паролей; хеши с
+        другой стоимостью пересчитываются при входе.
+        """
+        hashed = cls._DUMMY_HASH
+        if hashed is None:
+            with cls._dummy_lock:
+                if cls._DUMMY_HASH is None:
+                    cls._DUMMY_HASH = PasswordManager.hash_password(
+                        PasswordManager.generate_password(), Config.BCRYPT_ROUNDS
+                    )
+                hashed = cls._DUMMY_HASH
+        return hashed
+    
+    def prepare_dummy_hash(self):
+        """Заранее построить хеш-заглушку (вызывать вне потока интерфейса)"""
+        try:
+            self._dummy_hash()
+        except Exception as e:
+            logger.error("Ошибка подготовки хеша-заглушки: %s", e)
+    
     def authenticate(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """
         Аутентификация пользователя
@@ -59,30 +133,60 @@ class User(BaseModel):
             Данные пользователя или None
         """
         # Получаем пользователя по имени
-        query = """
-            SELECT u.*, r.name as role_name, 
-                   r.can_read, r.can_write, r.can_delete, 
-                   r.can_approve, r.can_admin
-            FROM users u
-            JOIN roles r ON u.role_id = r.id
-            WHERE u.username = ? AND u.is_active = 1
-        """
-        
-        row = self.db.fetchone(query, (username,))
+        row = self.db.fetchone(self._AUTH_QUERY, (username,))
         if not row:
-            logger.warning(f"Попытка входа с несуществующим пользователем: {username}")
+            # Тратим то же время, что и на проверку настоящего пароля
+            PasswordManager.verify_password(password, self._dummy_hash())
+            logger.warning("Попытка входа с несуществующим пользователем: %s", username)
             return None
         
         user_data = dict(row)
         
         # Проверяем пароль
         if not PasswordManager.verify_password(password, user_data['password_hash']):
-            logger.warning(f"Неверный пароль для пользователя: {username}")
+            logger.warning("Неверный пароль для пользователя: %s", username)
             return None
         
-        logger.info(f"Успешная аутентификация пользователя: {username}")
+        if PasswordManager.needs_rehash(user_data['password_hash'], Config.BCRYPT_ROUNDS):
+            self._rehash_password(user_data['id'], password)
+        
+        self._touch_last_login(user_data['id'])
+        logger.info("Успешная аутентификация пользователя: %s", username)
         return user_data
     
+    def _rehash_password(self, user_id: int, password: str):
+        """
+        Пересчитать хеш пароля со стоимостью Config.BCRYPT_ROUNDS
+        
+        Выполняется при успешном входе, пока пароль известен: так хеши
+        всех пользователей приходят к одной стоимости с хешем-заглушкой.
+        Ошибка записи не мешает входу.
+        """
+        try:
+            password_hash = PasswordManager.hash_password(password, Config.BCRYPT_ROUNDS)
+            self.db.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ?",
+                (password_hash, user_id)
+            )
+            logger.info("Хеш пароля пересчитан для пользователя ID: %s", user_id)
+        except Exception as e:
+            logger.error("Ошибка пересчета хеша пароля пользователя ID %s: %s", user_id, e)
+    
+    def _touch_last_login(self, user_id: int):
+        """
+        Записать время входа пользователя
+        
+        Одно выражение UPDATE - одна фиксация транзакции. Ошибка записи
+        не мешает входу.
+        """
+        try:
+            self.db.execute(
+                "UPDATE users SET last_login_at = ? WHERE id = ?",
+                (datetime.now(), user_id)
+            )
+        except Exception as e:
+            logger.error("Ошибка записи времени входа пользователя ID %s: %s", user_id, e)
+    
     def create_user(self, username: str, password: str, full_name: str,
                     position: str, role_id: int) -> Optional[int]:
         """
@@ -100,11 +204,11 @@ class User(BaseModel):
         """
         # Проверяем уникальность имени пользователя
         if self.exists({'username': username}):
-            logger.error(f"Пользователь {username} уже существует")
+            logger.error("Пользователь %s уже существует", username)
             return None
         
         # Хешируем пароль
-        password_hash = PasswordManager.hash_password(password)
+        password_hash = PasswordManager.hash_password(password, Config.BCRYPT_ROUNDS)
         
         # Создаем пользователя
         user_data = {
@@ -118,7 +222,7 @@ class User(BaseModel):
         
         user_id = self.create(user_data)
         if user_id:
-            logger.info(f"Создан пользователь: {username} (ID: {user_id})")
+            logger.info("Создан пользователь: %s (ID: %s)", username, user_id)
         
         return user_id
     
@@ -141,21 +245,21 @@ class User(BaseModel):
         
         # Проверяем старый пароль
         if not PasswordManager.verify_password(old_password, user['password_hash']):
-            logger.warning(f"Неверный старый пароль при смене для пользователя ID: {user_id}")
+            logger.warning("Неверный старый пароль при смене для пользователя ID: %s", user_id)
             return False
         
         # Проверяем сложность нового пароля
         valid, message = PasswordManager.validate_password_strength(new_password)
         if not valid:
-            logger.warning(f"Слабый новый пароль: {message}")
+            logger.warning("Слабый новый пароль: %s", message)
             return False
         
         # Обновляем пароль
-        new_hash = PasswordManager.hash_password(new_password)
+        new_hash = PasswordManager.hash_password(new_password, Config.BCRYPT_ROUNDS)
         success = self.update(user_id, {'password_hash': new_hash})
         
         if success:
-            logger.info(f"Пароль изменен для пользователя ID: {user_id}")
+            logger.info("Пароль изменен для пользователя ID: %s", user_id)
         
         return success
     
@@ -171,17 +275,23 @@ class User(BaseModel):
         """
         # Генерируем временный пароль
         temp_password = PasswordManager.generate_password()
-        password_hash = PasswordManager.hash_password(temp_password)
+        password_hash = PasswordManager.hash_password(temp_password, Config.BCRYPT_ROUNDS)
         
         # Обновляем пароль
         if self.update(user_id, {'password_hash': password_hash}):
-            logger.info(f"Пароль сброшен для пользователя ID: {user_id}")
+            logger.info("Пароль сброшен для пользователя ID: %s", user_id)
             return temp_password
         
         return None
     
-    def get_active_users(self) -> List[Dict[str, Any]]:
-        """Получить активных пользователей"""
+    def get_active_users(self) -> List[sqlite3.Row]:
+        """
+        Получить активных пользователей
+        
+        Строки возвращаются без копирования в dict: sqlite3.Row поддерживает
+        доступ по имени колонки (row['username']) и keys(). Если нужен
+        изменяемый словарь, преобразуйте строку через dict(row).
+        """
         query = """
             SELECT u.*, r.name as role_name
             FROM users u
@@ -189,8 +299,7 @@ class User(BaseModel):
             WHERE u.is_active = 1
             ORDER BY u.username
         """
-        rows = self.db.fetchall(query)
-        return [dict(row) for row in rows]
+        return self.db.fetchall(query)
     
     def deactivate_user(self, user_id: int) -> bool:
         """Деактивировать пользователя"""
@@ -2,12 +2,12 @@
 Диалог входа в систему
 """
 from PyQt6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
+    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
     QLineEdit, QPushButton, QCheckBox, QMessageBox,
-    QGroupBox, QComboBox
+    QGroupBox
 )
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QPixmap, QFont
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QFont
 import logging
 
 from ...models.user import User
@@ -16,6 +16,105 @@ from ...core.security import current_session
 logger = logging.getLogger(__name__)
 
 
+# Стили диалога входа. Селекторы ограничены #LoginDialog, поэтому таблица
+# один раз добавляется к стилям приложения и разбирается Qt однократно
+_LOGIN_QSS = """
+    QDialog#LoginDialog {
+        background-color: #f5f5f5;
+    }
+    
+    #LoginDialog QGroupBox {
+        font-weight: bold;
+        border: 2px solid #cccccc;
+        border-radius: 5px;
+        margin-top: 10px;
+        padding-top: 10px;
+    }
+    
+    #LoginDialog QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px 0 5px;
+    }
+    
+    #LoginDialog QLineEdit {
+        padding: 8px;
+        border: 1px solid #ddd;
+        border-radius: 4px;
+        font-size: 12px;
+    }
+    
+    #LoginDialog QLineEdit:focus {
+        border: 2px solid #4CAF50;
+        outline: none;
+    }
+    
+    #LoginDialog QPushButton {
+        padding: 8px 20px;
+        border: none;
+        border-radius: 4px;
+        font-weight: bold;
+        font-size: 12px;
+    }
+    
+    #LoginDialog QPushButton#login_button {
+        background-color: #4CAF50;
+        color: white;
+    }
+    
+    #LoginDialog QPushButton#login_button:hover {
+        background-color: #45a049;
+    }
+    
+    #LoginDialog QPushButton#login_button:pressed {
+        background-color: #3d8b40;
+    }
+    
+    #LoginDialog QPushButton#cancel_button {
+        background-color: #f44336;
+        color: white;
+    }
+    
+    #LoginDialog QPushButton#cancel_button:hover {
+        background-color: #da190b;
+    }
+"""
+
+
+class _AuthSignals(QObject):
+    """Сигналы фоновой аутентификации"""
+    
+    # Данные пользователя или None
+    finished = pyqtSignal(object)
+    # Текст ошибки
+    error = pyqtSignal(str)
+
+
+class _AuthWorker(QRunnable):
+    """
+    Аутентификация пользователя вне потока интерфейса
+    
+    bcrypt отпускает GIL на время вычисления хеша, поэтому потока из
+    QThreadPool достаточно и отдельный пул процессов не нужен.
+    """
+    
+    def __init__(self, db_connection, username: str, password: str):
+        super().__init__()
+        self.db = db_connection
+        self.username = username
+        self.password = password
+        self.signals = _AuthSignals()
+        
+    def run(self):
+        """Проверить учетные данные и отправить результат в UI"""
+        try:
+            user_data = User(self.db).authenticate(self.username, self.password)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(user_data)
+
+
 class LoginDialog(QDialog):
     """Диалог аутентификации пользователя"""
     
@@ -27,6 +126,10 @@ class LoginDialog(QDialog):
         self.db = db_connection
         self.current_user = None
         
+        # Выполняемая аутентификация
+        self._auth_worker = None
+        self._auth_username = ""
+        
         self.setWindowTitle("Вход в систему АИС-УЧЕТ")
         self.setFixedSize(400, 300)
         self.setModal(True)
@@ -40,6 +143,11 @@ class LoginDialog(QDialog):
         self._setup_ui()
         self._setup_styles()
         
+        # Хеш-заглушка для несуществующих имен строится заранее, пока
+        # пользователь вводит данные, а не при первой неудачной попытке
+        if self.db is not None:
+            QThreadPool.globalInstance().start(User(self.db).prepare_dummy_hash)
+        
     def _setup_ui(self):
         """Настройка интерфейса"""
         layout = QVBoxLayout()
@@ -125,67 +233,12 @@ class LoginDialog(QDialog):
         
     def _setup_styles(self):
         """Установка стилей"""
-        self.setStyleSheet("""
-            QDialog {
-                background-color: #f5f5f5;
-            }
-            
-            QGroupBox {
-                font-weight: bold;
-                border: 2px solid #cccccc;
-                border-radius: 5px;
-                margin-top: 10px;
-                padding-top: 10px;
-            }
-            
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 5px 0 5px;
-            }
-            
-            QLineEdit {
-                padding: 8px;
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                font-size: 12px;
-            }
-            
-            QLineEdit:focus {
-                border: 2px solid #4CAF50;
-                outline: none;
-            }
-            
-            QPushButton {
-                padding: 8px 20px;
-                border: none;
-                border-radius: 4px;
-                font-weight: bold;
-                font-size: 12px;
-            }
-            
-            QPushButton#login_button {
-                background-color: #4CAF50;
-                color: white;
-            }
-            
-            QPushButton#login_button:hover {
-                background-color: #45a049;
-            }
+        # Стили подключаются к приложению при первом открытии диалога
+        app = QApplication.instance()
+        if _LOGIN_QSS not in app.styleSheet():
+            app.setStyleSheet(app.styleSheet() + _LOGIN_QSS)
             
-            QPushButton#login_button:pressed {
-                background-color: #3d8b40;
-            }
-            
-            QPushButton#cancel_button {
-                background-color: #f44336;
-                color: white;
-            }
-            
-            QPushButton#cancel_button:hover {
-                background-color: #da190b;
-            }
-        """)
+        self.setObjectName("LoginDialog")
         
         self.login_button.setObjectName("login_button")
         self.cancel_button.setObjectName("cancel_button")
@@ -208,17 +261,25 @@ class LoginDialog(QDialog):
         # Блокируем интерфейс
         self.setEnabled(False)
         
+        # Аутентификация через модель User в пуле потоков Qt:
+        # проверка bcrypt не блокирует цикл событий
+        self._auth_username = username
+        self._auth_worker = _AuthWorker(self.db, username, password)
+        self._auth_worker.signals.finished.connect(self._on_auth_done)
+        self._auth_worker.signals.error.connect(self._on_auth_error)
+        QThreadPool.globalInstance().start(self._auth_worker)
+        
+    def _on_auth_done(self, user_data):
+        """Обработка результата аутентификации"""
+        self._auth_worker = None
+        
         try:
-            # Аутентификация через модель User
-            user_model = User(self.db)
-            user_data = user_model.authenticate(username, password)
-            
             if user_data:
                 # Сохраняем данные в сессии
                 current_session.set_user(user_data)
                 self.current_user = user_data
                 
-                logger.info(f"Успешный вход пользователя: {username}")
+                logger.info("Успешный вход пользователя: %s", self._auth_username)
                 
                 # Сохраняем логин если нужно
                 if self.remember_checkbox.isChecked():
@@ -236,16 +297,20 @@ class LoginDialog(QDialog):
                 )
                 self.password_input.clear()
                 self.password_input.setFocus()
-                
-        except Exception as e:
-            logger.error(f"Ошибка при входе: {e}")
-            QMessageBox.critical(
-                self, 
-                "Ошибка", 
-                f"Ошибка подключения к базе данных:\n{str(e)}"
-            )
         finally:
             self.setEnabled(True)
+            
+    def _on_auth_error(self, error: str):
+        """Обработка ошибки аутентификации"""
+        self._auth_worker = None
+        
+        logger.error("Ошибка при входе: %s", error)
+        QMessageBox.critical(
+            self, 
+            "Ошибка", 
+            f"Ошибка подключения к базе данных:\n{error}"
+        )
+        self.setEnabled(True)
     
     def set_database(self, db_connection):
         """Установить подключение к БД"""
@@ -2,21 +2,117 @@
 Главное окно приложения
 """
 from PyQt6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QStatusBar, QLabel, QMessageBox, QMdiArea,
-    QMdiSubWindow, QSplitter, QTreeWidget, QTreeWidgetItem
+    QMdiSubWindow, QSplitter, QTreeView, QProgressDialog
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QDateTime
-from PyQt6.QtGui import QAction, QCloseEvent
+from PyQt6.QtCore import (
+    Qt, QTimer, pyqtSignal, QDateTime, QTime, QModelIndex,
+    QObject, QRunnable, QThreadPool
+)
+from PyQt6.QtGui import (
+    QAction, QCloseEvent, QShowEvent, QHideEvent,
+    QStandardItemModel, QStandardItem
+)
+from PyQt6 import sip
+from types import MappingProxyType
 import logging
 
 from .widgets.ribbon_widget import RibbonWidget
+from .resources import get_icon
 from .dialogs.login_dialog import LoginDialog
 from ..core.security import current_session
 from ..database.connection import DatabaseConnection
 
 logger = logging.getLogger(__name__)
 
+# Главное окно, открытое после повторного входа (см. _open_login)
+_main_window = None
+
+# Разделы дерева навигации: (заголовок, иконка, пункты, развернут ли раздел).
+# Иконки вместо символов эмодзи в тексте: такие символы при каждой
+# отрисовке требуют шрифта с цветными глифами
+NAV_TREE = [
+    ("Документы", "docs", [
+        "Приходные документы",
+        "Расходные документы",
+        "Внутренние документы",
+    ], True),
+    ("Справочники", "directories", [
+        "Номенклатура",
+        "Организации",
+        "Отделы",
+        "Должностные лица",
+    ], True),
+    ("Учет", "accounting", [
+        "Остатки МС",
+        "Учетные карточки",
+        "Движение МС",
+    ], True),
+    ("Отчеты", "reports", [
+        "Оборотная ведомость",
+        "Сводка наличия",
+        "Инвентаризация",
+    ], False),
+]
+
+# Соответствие элементов дерева навигации и действий
+_TREE_ACTIONS = MappingProxyType({
+    "Номенклатура": "nomenclature",
+    "Организации": "organizations",
+    "Отделы": "departments",
+    "Остатки МС": "stock_balance",
+    "Учетные карточки": "accounting_cards",
+    "Приходные документы": "income_documents",
+    "Расходные документы": "expense_documents",
+    "Пользователи": "users",
+    "Журнал аудита": "audit_log",
+    "Оборотная ведомость": "report_turnover",
+    "Сводка наличия": "report_balance",
+})
+
+# Действия, доступные только администратору
+_ADMIN_ACTIONS = frozenset({'users', 'roles', 'audit'})
+
+# Права, проверяемые главным окном
+_WINDOW_PERMISSIONS = ('can_write', 'can_delete', 'can_admin')
+
+# Раздел, доступный только администратору
+NAV_TREE_ADMIN = ("Сервис", "service", [
+    "Пользователи",
+    "Резервное копирование",
+    "Импорт данных",
+    "Журнал аудита",
+], False)
+
+
+class _BackupSignals(QObject):
+    """Сигналы фонового резервного копирования"""
+    
+    # Путь к созданной копии
+    finished = pyqtSignal(str)
+    # Текст ошибки
+    error = pyqtSignal(str)
+
+
+class _BackupWorker(QRunnable):
+    """Резервное копирование БД вне потока интерфейса"""
+    
+    def __init__(self, db_connection: DatabaseConnection, backup_dir):
+        super().__init__()
+        self.db = db_connection
+        self.backup_dir = backup_dir
+        self.signals = _BackupSignals()
+        
+    def run(self):
+        """Создать копию и отправить результат в UI"""
+        try:
+            backup_path = self.db.backup(self.backup_dir)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(str(backup_path))
+
 
 class MainWindow(QMainWindow):
     """Главное окно приложения"""
@@ -28,12 +124,74 @@ class MainWindow(QMainWindow):
         self.db = db_connection
         self.user_data = user_data
         
-        # Словарь открытых окон
+        # Открытые окна: класс окна -> подокно MDI
         self.open_windows = {}
         
+        # Права пользователя не меняются за время жизни окна
+        self._perms = {
+            name: current_session.has_permission(name)
+            for name in _WINDOW_PERMISSIONS
+        }
+        
+        # Окна сообщений создаются один раз и переиспользуются
+        self._confirm_box = QMessageBox(
+            QMessageBox.Icon.Question, "", "",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            self
+        )
+        self._message_box = QMessageBox(self)
+        
+        # Выполняемое резервное копирование
+        self._backup_worker = None
+        self._backup_interactive = False
+        self._backup_progress = None
+        
         self.setWindowTitle(f"АИС-УЧЕТ - {user_data['full_name']} ({user_data['role_name']})")
         self.setGeometry(100, 100, config.WINDOW_WIDTH, config.WINDOW_HEIGHT)
         
+        # Закрытое окно удаляется сразу, а не живет до конца программы
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, True)
+        
+        # Окно закрывается при выходе из системы, а не из программы
+        self._logging_out = False
+        # Закрытие подтверждено и ждет завершения резервного копирования
+        self._closing = False
+        
+        # Обработчики действий Ribbon (строятся один раз)
+        self._ribbon_handlers = {
+            # Файл
+            'new_database': self._new_database,
+            'open_database': self._open_database,
+            'backup': self._create_backup,
+            'logout': self._logout,
+            
+            # Документы
+            'act_income': self._open_act_income,
+            'order': self._open_order,
+            'income_book': self._open_income_book,
+            'expense_book': self._open_expense_book,
+            
+            # Справочники
+            'nomenclature': self._open_nomenclature,
+            'departments': self._open_departments,
+            'organizations': self._open_organizations,
+            'officials': self._open_officials,
+            
+            # Отчеты
+            'report_balance': self._open_report_balance,
+            'report_turnover': self._open_report_turnover,
+            'report_card': self._open_report_card,
+            
+            # Сервис
+            'users': self._open_users_management,
+            'audit': self._open_audit_log,
+            'import_dbf': self._import_from_dbf,
+            
+            # Прочее
+            'settings': self._open_settings,
+            'refresh': self._refresh_current_window,
+        }
+        
         self._setup_ui()
         self._setup_status_bar()
         self._setup_timers()
@@ -71,100 +229,90 @@ class MainWindow(QMainWindow):
         self.mdi_area.setTabsMovable(True)
         work_area.addWidget(self.mdi_area)
         
-        # Устанавливаем пропорции
+        # При изменении размера окна растет только MDI область; дерево
+        # сохраняет ширину в пределах своих ограничений
+        work_area.setStretchFactor(0, 0)
+        work_area.setStretchFactor(1, 1)
+        work_area.setCollapsible(0, False)
+        
+        # Начальные пропорции
         work_area.setSizes([250, self.config.WINDOW_WIDTH - 250])
         
         main_layout.addWidget(work_area)
         central_widget.setLayout(main_layout)
         
-    def _create_navigation_tree(self) -> QTreeWidget:
+    def _create_navigation_tree(self) -> QTreeView:
         """Создать дерево навигации"""
-        tree = QTreeWidget()
-        tree.setHeaderLabel("Навигация")
+        tree = QTreeView()
+        tree.setEditTriggers(QTreeView.EditTrigger.NoEditTriggers)
         tree.setMinimumWidth(200)
+        tree.setMaximumWidth(400)
+        
+        # Все строки одной высоты: представление не опрашивает sizeHint
+        # каждого элемента при раскрытии и выделении
+        tree.setUniformRowHeights(True)
         
         # Стиль дерева
         tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 background-color: #f8f9fa;
                 border: 1px solid #dee2e6;
                 padding: 5px;
                 font-size: 12px;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 padding: 5px;
                 border-radius: 3px;
             }
-            QTreeWidget::item:hover {
+            QTreeView::item:hover {
                 background-color: #e9ecef;
             }
-            QTreeWidget::item:selected {
+            QTreeView::item:selected {
                 background-color: #007bff;
                 color: white;
             }
         """)
         
-        # Документы
-        docs_item = QTreeWidgetItem(tree, ["📄 Документы"])
-        QTreeWidgetItem(docs_item, ["Приходные документы"])
-        QTreeWidgetItem(docs_item, ["Расходные документы"])
-        QTreeWidgetItem(docs_item, ["Внутренние документы"])
-        docs_item.setExpanded(True)
-        
-        # Справочники
-        dirs_item = QTreeWidgetItem(tree, ["📚 Справочники"])
-        QTreeWidgetItem(dirs_item, ["Номенклатура"])
-        QTreeWidgetItem(dirs_item, ["Организации"])
-        QTreeWidgetItem(dirs_item, ["Отделы"])
-        QTreeWidgetItem(dirs_item, ["Должностные лица"])
-        dirs_item.setExpanded(True)
-        
-        # Учет
-        account_item = QTreeWidgetItem(tree, ["📊 Учет"])
-        QTreeWidgetItem(account_item, ["Остатки МС"])
-        QTreeWidgetItem(account_item, ["Учетные карточки"])
-        QTreeWidgetItem(account_item, ["Движение МС"])
-        account_item.setExpanded(True)
-        
-        # Отчеты
-        reports_item = QTreeWidgetItem(tree, ["📈 Отчеты"])
-        QTreeWidgetItem(reports_item, ["Оборотная ведомость"])
-        QTreeWidgetItem(reports_item, ["Сводка наличия"])
-        QTreeWidgetItem(reports_item, ["Инвентаризация"])
-        
-        # Сервис
-        if current_session.has_permission('can_admin'):
-            service_item = QTreeWidgetItem(tree, ["⚙️ Сервис"])
-            QTreeWidgetItem(service_item, ["Пользователи"])
-            QTreeWidgetItem(service_item, ["Резервное копирование"])
-            QTreeWidgetItem(service_item, ["Импорт данных"])
-            QTreeWidgetItem(service_item, ["Журнал аудита"])
+        # Модель дерева строится из статического описания разделов
+        self._nav_model = QStandardItemModel(tree)
+        self._nav_model.setHorizontalHeaderLabels(["Навигация"])
+        
+        sections = list(NAV_TREE)
+        if self._perms['can_admin']:
+            sections.append(NAV_TREE_ADMIN)
+            
+        # Без промежуточных перерисовок на время построения
+        tree.setUpdatesEnabled(False)
+        
+        root = self._nav_model.invisibleRootItem()
+        collapsed = []
+        for title, icon_name, children, is_expanded in sections:
+            section = QStandardItem(get_icon(icon_name), title)
+            section.appendRows([QStandardItem(child) for child in children])
+            root.appendRow(section)
+            if not is_expanded:
+                collapsed.append(section)
+                
+        tree.setModel(self._nav_model)
+        
+        # Разделы раскрываются одним проходом, свернутые по умолчанию
+        # закрываются обратно
+        tree.expandToDepth(0)
+        for section in collapsed:
+            tree.collapse(section.index())
+            
+        tree.setUpdatesEnabled(True)
         
         # Обработка клика
-        tree.itemClicked.connect(self._handle_tree_click)
+        tree.clicked.connect(self._handle_tree_click)
         
         return tree
     
-    def _handle_tree_click(self, item: QTreeWidgetItem, column: int):
+    def _handle_tree_click(self, index: QModelIndex):
         """Обработка клика по дереву навигации"""
-        item_text = item.text(0)
-        
-        # Словарь соответствия элементов дерева и действий
-        actions_map = {
-            "Номенклатура": "nomenclature",
-            "Организации": "organizations",
-            "Отделы": "departments",
-            "Остатки МС": "stock_balance",
-            "Учетные карточки": "accounting_cards",
-            "Приходные документы": "income_documents",
-            "Расходные документы": "expense_documents",
-            "Пользователи": "users",
-            "Журнал аудита": "audit_log",
-            "Оборотная ведомость": "report_turnover",
-            "Сводка наличия": "report_balance"
-        }
+        item_text = self._nav_model.itemFromIndex(index).text()
         
-        action = actions_map.get(item_text)
+        action = _TREE_ACTIONS.get(item_text)
         if action:
             self._handle_ribbon_action(action)
     
@@ -173,35 +321,67 @@ class MainWindow(QMainWindow):
         status_bar = QStatusBar()
         self.setStatusBar(status_bar)
         
+        # Иконки - отдельными метками, текст меток без эмодзи
+        
         # Пользователь
-        self.user_label = QLabel(f"👤 {self.user_data['full_name']}")
+        status_bar.addWidget(self._icon_label("user"))
+        self.user_label = QLabel(self.user_data['full_name'])
         status_bar.addWidget(self.user_label)
         
         # Роль
-        self.role_label = QLabel(f"🔑 {self.user_data['role_name']}")
+        status_bar.addWidget(self._icon_label("role"))
+        self.role_label = QLabel(self.user_data['role_name'])
         status_bar.addWidget(self.role_label)
         
         # Разделитель
         status_bar.addWidget(QLabel(" | "))
         
         # База данных
+        status_bar.addWidget(self._icon_label("database"))
         db_name = self.db.db_path.name
-        self.db_label = QLabel(f"💾 {db_name}")
+        self.db_label = QLabel(db_name)
         status_bar.addWidget(self.db_label)
         
         # Растяжка
         status_bar.addPermanentWidget(QLabel(""))
         
+        # Сообщение об автоматической резервной копии: скрыто, пока
+        # копия не создана (showMessage показывает только текст)
+        self.backup_icon = self._icon_label("ok")
+        self.backup_label = QLabel("Резервная копия создана")
+        for widget in (self.backup_icon, self.backup_label):
+            widget.hide()
+            status_bar.addPermanentWidget(widget)
+            
+        self._backup_notice_timer = QTimer(self)
+        self._backup_notice_timer.setSingleShot(True)
+        self._backup_notice_timer.timeout.connect(self.backup_icon.hide)
+        self._backup_notice_timer.timeout.connect(self.backup_label.hide)
+        
         # Время
         self.time_label = QLabel()
         status_bar.addPermanentWidget(self.time_label)
         
+    @staticmethod
+    def _icon_label(name: str) -> QLabel:
+        """Метка с иконкой для статусной строки"""
+        label = QLabel()
+        label.setPixmap(get_icon(name).pixmap(16, 16))
+        return label
+        
     def _setup_timers(self):
         """Настройка таймеров"""
-        # Таймер для обновления времени
+        # Таймер для обновления времени. Часы показывают минуты, поэтому
+        # таймер срабатывает на границе минуты; запускается в showEvent
         self.time_timer = QTimer()
+        # Грубый таймер может сработать раньше границы минуты и показать
+        # прежнее время
+        self.time_timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.time_timer.timeout.connect(self._update_time)
-        self.time_timer.start(1000)  # Каждую секунду
+        
+        # Формат и источник времени для _update_time
+        self._fmt = "dd.MM.yyyy hh:mm"
+        self._now = QDateTime.currentDateTime
         
         # Таймер для автоматического резервного копирования
         if self.config.DEBUG:
@@ -215,32 +395,114 @@ class MainWindow(QMainWindow):
         self.backup_timer.timeout.connect(self._auto_backup)
         self.backup_timer.start(backup_interval)
         
+    def _start_clock(self):
+        """Показать время и запустить таймер до начала следующей минуты"""
+        self._update_time()
+        now = QTime.currentTime()
+        self.time_timer.start(60_000 - now.second() * 1000 - now.msec())
+        
     def _update_time(self):
         """Обновить время в статусной строке"""
-        current_time = QDateTime.currentDateTime().toString("dd.MM.yyyy hh:mm:ss")
-        self.time_label.setText(f"🕐 {current_time}")
+        self.time_label.setText(self._now().toString(self._fmt))
+        
+        # После первого, выровненного срабатывания - раз в минуту
+        if self.time_timer.interval() != 60_000:
+            self.time_timer.setInterval(60_000)
+            
+    def showEvent(self, event: QShowEvent):
+        """Запустить часы при показе окна"""
+        super().showEvent(event)
+        self._start_clock()
+        
+    def hideEvent(self, event: QHideEvent):
+        """Остановить часы, пока окно скрыто"""
+        self.time_timer.stop()
+        super().hideEvent(event)
         
     def _auto_backup(self):
         """Автоматическое резервное копирование"""
-        try:
-            backup_path = self.db.backup(self.config.BACKUP_DIR)
+        self._start_backup(interactive=False)
+        
+    def _start_backup(self, interactive: bool) -> bool:
+        """
+        Запустить резервное копирование в пуле потоков
+        
+        Args:
+            interactive: Копия запрошена пользователем (результат в диалоге)
+            
+        Returns:
+            False, если копирование уже выполняется
+        """
+        if self._backup_worker is not None:
+            return False
+            
+        self._backup_interactive = interactive
+        self._backup_worker = _BackupWorker(self.db, self.config.BACKUP_DIR)
+        self._backup_worker.signals.finished.connect(self._on_backup_done)
+        self._backup_worker.signals.error.connect(self._on_backup_error)
+        QThreadPool.globalInstance().start(self._backup_worker)
+        return True
+        
+    def _show_backup_progress(self):
+        """Показать окно ожидания резервного копирования"""
+        if self._backup_progress is not None:
+            return
+            
+        # Окно ожидания закрывается по завершении копирования
+        self._backup_progress = QProgressDialog(
+            "Создание резервной копии...", None, 0, 0, self
+        )
+        self._backup_progress.setWindowTitle("Резервная копия")
+        self._backup_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self._backup_progress.setMinimumDuration(0)
+        self._backup_progress.show()
+        
+    def _finish_backup(self):
+        """Сбросить состояние после завершения копирования"""
+        self._backup_worker = None
+        if self._backup_progress is not None:
+            self._backup_progress.close()
+            self._backup_progress = None
+            
+        # Отложенное закрытие продолжается после обработки результата
+        if self._closing:
+            QTimer.singleShot(0, self.close)
+            
+    def _on_backup_done(self, backup_path: str):
+        """Обработка успешного резервного копирования"""
+        self._finish_backup()
+        
+        if self._backup_interactive and not self._closing:
+            self._show_message(QMessageBox.Icon.Information, "Резервная копия",
+                               f"Резервная копия создана:\n{backup_path}")
+        else:
             logger.info(f"Автоматическое резервное копирование: {backup_path}")
-            self.statusBar().showMessage("✅ Резервная копия создана", 5000)
-        except Exception as e:
-            logger.error(f"Ошибка автоматического резервного копирования: {e}")
+            self.backup_icon.show()
+            self.backup_label.show()
+            self._backup_notice_timer.start(5000)
+            
+    def _on_backup_error(self, error: str):
+        """Обработка ошибки резервного копирования"""
+        self._finish_backup()
+        
+        if self._backup_interactive and not self._closing:
+            self._show_message(QMessageBox.Icon.Critical, "Ошибка",
+                               f"Ошибка создания резервной копии:\n{error}")
+        else:
+            logger.error(f"Ошибка автоматического резервного копирования: {error}")
             
     def _check_permissions(self):
         """Проверка и установка прав доступа"""
         # Отключаем элементы интерфейса в зависимости от прав
-        if not current_session.has_permission('can_write'):
+        if not self._perms['can_write']:
             # Отключаем создание и редактирование
             pass
             
-        if not current_session.has_permission('can_delete'):
+        if not self._perms['can_delete']:
             # Отключаем удаление
             pass
             
-        if not current_session.has_permission('can_admin'):
+        if not self._perms['can_admin']:
             # Скрываем вкладку "Сервис"
             self.ribbon.setTabEnabled(4, False)  # Вкладка "Сервис"
             
@@ -249,66 +511,75 @@ class MainWindow(QMainWindow):
         logger.debug(f"Ribbon action: {action}")
         
         # Проверяем права
-        if action in ['users', 'roles', 'audit'] and not current_session.has_permission('can_admin'):
-            QMessageBox.warning(self, "Доступ запрещен", 
+        if action in _ADMIN_ACTIONS and not self._perms['can_admin']:
+            self._show_message(QMessageBox.Icon.Warning, "Доступ запрещен",
                                "У вас недостаточно прав для выполнения этого действия")
             return
             
-        # Словарь обработчиков действий
-        handlers = {
-            # Файл
-            'new_database': self._new_database,
-            'open_database': self._open_database,
-            'backup': self._create_backup,
-            'logout': self._logout,
-            
-            # Документы
-            'act_income': self._open_act_income,
-            'order': self._open_order,
-            'income_book': self._open_income_book,
-            'expense_book': self._open_expense_book,
-            
-            # Справочники
-            'nomenclature': self._open_nomenclature,
-            'departments': self._open_departments,
-            'organizations': self._open_organizations,
-            'officials': self._open_officials,
-            
-            # Отчеты
-            'report_balance': self._open_report_balance,
-            'report_turnover': self._open_report_turnover,
-            'report_card': self._open_report_card,
-            
-            # Сервис
-            'users': self._open_users_management,
-            'audit': self._open_audit_log,
-            'import_dbf': self._import_from_dbf,
-            
-            # Прочее
-            'settings': self._open_settings,
-            'refresh': self._refresh_current_window,
-        }
-        
-        handler = handlers.get(action)
+        handler = self._ribbon_handlers.get(action)
         if handler:
             try:
                 handler()
             except Exception as e:
                 logger.error(f"Ошибка выполнения действия {action}: {e}")
-                QMessageBox.critical(self, "Ошибка", 
-                                    f"Ошибка выполнения операции:\n{str(e)}")
+                self._show_message(QMessageBox.Icon.Critical, "Ошибка",
+                                   f"Ошибка выполнения операции:\n{str(e)}")
         else:
             # Временная заглушка для нереализованных функций
-            QMessageBox.information(self, "В разработке", 
-                                  f"Функция '{action}' находится в разработке")
+            self._show_message(QMessageBox.Icon.Information, "В разработке",
+                               f"Функция '{action}' находится в разработке")
             
+    def _confirm(self, title: str, text: str, default_yes: bool = True) -> bool:
+        """
+        Запросить подтверждение у пользователя
+        
+        Args:
+            title: Заголовок окна
+            text: Текст вопроса
+            default_yes: Кнопка по умолчанию - "Да" (иначе "Нет")
+            
+        Returns:
+            True, если пользователь ответил "Да"
+        """
+        box = self._confirm_box
+        if box.isVisible():
+            # Окно уже показано (вложенный вызов) - нужен отдельный экземпляр
+            box = QMessageBox(box.icon(), "", "", box.standardButtons(), self)
+        box.setWindowTitle(title)
+        box.setText(text)
+        box.setDefaultButton(
+            QMessageBox.StandardButton.Yes if default_yes
+            else QMessageBox.StandardButton.No
+        )
+        return box.exec() == QMessageBox.StandardButton.Yes
+        
+    def _show_message(self, icon: QMessageBox.Icon, title: str, text: str):
+        """Показать сообщение (информация, предупреждение или ошибка)"""
+        box = self._message_box
+        if box.isVisible():
+            box = QMessageBox(self)
+        box.setIcon(icon)
+        box.setWindowTitle(title)
+        box.setText(text)
+        box.exec()
+        
     def _open_window(self, window_class, title: str, *args, **kwargs):
-        """Универсальный метод открытия окна в MDI области"""
-        # Проверяем, не открыто ли уже окно
-        if title in self.open_windows:
-            # Активируем существующее окно
-            self.mdi_area.setActiveSubWindow(self.open_windows[title])
-            return self.open_windows[title].widget()
+        """
+        Универсальный метод открытия окна в MDI области
+        
+        Окно каждого класса открывается в одном экземпляре: повторный
+        вызов активирует уже открытое окно.
+        """
+        # Проверяем, не открыто ли уже окно. Закрытое подокно удаляется
+        # Qt (WA_DeleteOnClose), поэтому ссылка на него становится
+        # недействительной без отдельного обработчика destroyed
+        sub_window = self.open_windows.get(window_class)
+        if sub_window is not None:
+            if not sip.isdeleted(sub_window):
+                # Активируем существующее окно
+                self.mdi_area.setActiveSubWindow(sub_window)
+                return sub_window.widget()
+            del self.open_windows[window_class]
             
         try:
             # Создаем новое окно
@@ -318,10 +589,7 @@ class MainWindow(QMainWindow):
             sub_window.show()
             
             # Сохраняем ссылку
-            self.open_windows[title] = sub_window
-            
-            # Удаляем из словаря при закрытии
-            sub_window.destroyed.connect(lambda: self.open_windows.pop(title, None))
+            self.open_windows[window_class] = sub_window
             
             return widget
             
@@ -332,38 +600,35 @@ class MainWindow(QMainWindow):
     # Заглушки для обработчиков (будут реализованы далее)
     def _new_database(self):
         """Создать новую БД"""
-        QMessageBox.information(self, "Новая БД", "Функция создания новой БД")
+        self._show_message(QMessageBox.Icon.Information, "Новая БД",
+                           "Функция создания новой БД")
         
     def _open_database(self):
         """Открыть БД"""
-        QMessageBox.information(self, "Открыть БД", "Функция открытия БД")
+        self._show_message(QMessageBox.Icon.Information, "Открыть БД",
+                           "Функция открытия БД")
         
     def _create_backup(self):
         """Создать резервную копию"""
-        try:
-            backup_path = self.db.backup(self.config.BACKUP_DIR)
-            QMessageBox.information(self, "Резервная копия", 
-                                  f"Резервная копия создана:\n{backup_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка создания резервной копии:\n{str(e)}")
+        if not self._start_backup(interactive=True):
+            self._show_message(QMessageBox.Icon.Information, "Резервная копия",
+                               "Резервное копирование уже выполняется")
+            return
+            
+        self._show_backup_progress()
             
     def _logout(self):
         """Выход из системы"""
-        reply = QMessageBox.question(self, "Выход", 
-                                    "Вы действительно хотите выйти из системы?",
-                                    QMessageBox.StandardButton.Yes | 
-                                    QMessageBox.StandardButton.No)
-        
-        if reply == QMessageBox.StandardButton.Yes:
-            current_session.clear()
-            self.close()
-            
-            # Показываем диалог входа снова
-            login_dialog = LoginDialog(self.db)
-            if login_dialog.exec() == LoginDialog.DialogCode.Accepted:
-                # Создаем новое главное окно
-                new_window = MainWindow(self.config, self.db, login_dialog.current_user)
-                new_window.show()
+        if not self._confirm("Выход", "Вы действительно хотите выйти из системы?"):
+            return
+            
+        current_session.clear()
+        
+        # Приложение не должно завершиться, пока между закрытием этого
+        # окна и входом нового пользователя нет ни одного окна
+        QApplication.instance().setQuitOnLastWindowClosed(False)
+        self._logging_out = True
+        self.close()
                 
     def _refresh_current_window(self):
         """Обновить текущее окно"""
@@ -390,30 +655,83 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event: QCloseEvent):
         """Обработка закрытия окна"""
-        reply = QMessageBox.question(
-            self, 
+        # При выходе из системы и отложенном закрытии подтверждение
+        # уже получено
+        if not (self._logging_out or self._closing) and not self._confirm(
             "Закрытие программы",
             "Вы действительно хотите закрыть программу?\n"
             "Все несохраненные данные будут потеряны.",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-            QMessageBox.StandardButton.No
-        )
-        
-        if reply == QMessageBox.StandardButton.Yes:
-            # Закрываем все подокна
-            self.mdi_area.closeAllSubWindows()
-            
-            # Останавливаем таймеры
-            self.time_timer.stop()
-            self.backup_timer.stop()
+            default_yes=False
+        ):
+            event.ignore()
+            return
             
-            # Очищаем сессию
-            current_session.clear()
+        # Копирование использует подключение к БД: закрываемся после его
+        # завершения, а пока показываем окно ожидания
+        if self._backup_worker is not None:
+            self._closing = True
+            self._show_backup_progress()
+            event.ignore()
+            return
             
+        # Удаляем подокна разом: без активации каждого следующего окна
+        # и перерисовки MDI области после каждого закрытия
+        self.mdi_area.blockSignals(True)
+        self.mdi_area.setUpdatesEnabled(False)
+        for sub_window in self.mdi_area.subWindowList():
+            sub_window.deleteLater()
+        self.open_windows.clear()
+        
+        # Останавливаем таймеры
+        self.time_timer.stop()
+        self.backup_timer.stop()
+        
+        # Очищаем сессию
+        current_session.clear()
+        
+        if self._logging_out:
+            # Подключение к БД нужно следующему пользователю. Диалог входа
+            # открывается из цикла событий, когда это окно уже удалено
+            # (WA_DeleteOnClose)
+            logger.info(f"Выход из системы пользователя: {self.user_data['username']}")
+            QTimer.singleShot(0, lambda cfg=self.config, db=self.db: _open_login(cfg, db))
+        else:
             # Закрываем подключение к БД
             self.db.close()
-            
             logger.info(f"Приложение закрыто пользователем: {self.user_data['username']}")
-            event.accept()
-        else:
-            event.ignore()
+            
+        event.accept()
+
+
+def _open_login(config, db_connection: DatabaseConnection):
+    """
+    Показать диалог входа и открыть главное окно для вошедшего пользователя
+    
+    Вызывается из цикла событий после закрытия предыдущего главного окна,
+    поэтому старое окно к этому моменту уже удалено.
+    """
+    global _main_window
+    app = QApplication.instance()
+    
+    try:
+        login_dialog = LoginDialog(db_connection)
+        accepted = login_dialog.exec() == LoginDialog.DialogCode.Accepted
+        if accepted:
+            _main_window = MainWindow(config, db_connection, login_dialog.current_user)
+            _main_window.show()
+    except Exception as e:
+        # Ни одного окна не осталось, а выход при закрытии последнего окна
+        # отключен в _logout - без явного quit() процесс остался бы висеть
+        logger.error(f"Ошибка повторного входа: {e}", exc_info=True)
+        app.setQuitOnLastWindowClosed(True)
+        db_connection.close()
+        app.quit()
+        return
+        
+    if accepted:
+        app.setQuitOnLastWindowClosed(True)
+    else:
+        # Вход отменен - завершаем приложение
+        logger.info("Вход отменен пользователем")
+        db_connection.close()
+        app.quit()
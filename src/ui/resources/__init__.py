@@ -0,0 +1,43 @@
+"""
+Ресурсы интерфейса: кеш иконок
+"""
+from typing import Dict
+
+from PyQt6.QtWidgets import QApplication, QStyle
+from PyQt6.QtGui import QIcon
+
+# Имя иконки -> стандартная иконка стиля
+ICON_SOURCES: Dict[str, QStyle.StandardPixmap] = {
+    "docs": QStyle.StandardPixmap.SP_FileIcon,
+    "directories": QStyle.StandardPixmap.SP_DirIcon,
+    "accounting": QStyle.StandardPixmap.SP_FileDialogDetailedView,
+    "reports": QStyle.StandardPixmap.SP_FileDialogContentsView,
+    "service": QStyle.StandardPixmap.SP_ComputerIcon,
+    "database": QStyle.StandardPixmap.SP_DriveHDIcon,
+    "user": QStyle.StandardPixmap.SP_DirHomeIcon,
+    "role": QStyle.StandardPixmap.SP_FileDialogInfoView,
+    "ok": QStyle.StandardPixmap.SP_DialogApplyButton,
+}
+
+# Загруженные иконки (QIcon можно создать только после QApplication)
+_ICONS: Dict[str, QIcon] = {}
+
+
+def get_icon(name: str) -> QIcon:
+    """
+    Получить иконку по имени
+
+    Иконка загружается при первом обращении и далее берется из кеша.
+
+    Args:
+        name: Имя иконки из ICON_SOURCES
+
+    Returns:
+        Иконка (пустая, если имя неизвестно)
+    """
+    icon = _ICONS.get(name)
+    if icon is None:
+        source = ICON_SOURCES.get(name)
+        icon = QApplication.style().standardIcon(source) if source is not None else QIcon()
+        _ICONS[name] = icon
+    return icon
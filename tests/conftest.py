@@ -0,0 +1,34 @@
+"""
+Общие фикстуры тестов
+"""
+import pytest
+
+from src.database.connection import DatabaseConnection
+from src.models.base import BaseModel
+
+
+class Nomenclature(BaseModel):
+    """Модель номенклатуры для тестов BaseModel"""
+
+    table_name = "nomenclature"
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Новая БД со всеми миграциями"""
+    connection = DatabaseConnection(tmp_path / "test.db")
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def nomenclature(db):
+    """Модель номенклатуры с аудитом от имени администратора"""
+    return Nomenclature(db, audit_user_id=1)
+
+
+def audit_rows(db, action=None):
+    """Записи журнала аудита (при необходимости - одного действия)"""
+    if action is None:
+        return db.fetchall("SELECT * FROM audit_log ORDER BY id")
+    return db.fetchall("SELECT * FROM audit_log WHERE action = ? ORDER BY id", (action,))
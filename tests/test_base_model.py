@@ -0,0 +1,161 @@
+"""
+Тесты CRUD и аудита BaseModel
+"""
+import json
+import sqlite3
+
+import pytest
+
+from src.models import base
+from .conftest import Nomenclature, audit_rows
+
+
+def _create(model, code, name, **extra):
+    """Создать позицию номенклатуры"""
+    return model.create({'code': code, 'name': name, 'unit': 'шт', **extra})
+
+
+def test_update_audits_only_changed_fields(nomenclature, db):
+    """Аудит изменения хранит только изменившиеся поля"""
+    record_id = _create(nomenclature, '0102003004', 'Болт')
+
+    assert nomenclature.update(record_id, {'name': 'Болт М8', 'unit': 'шт'})
+    assert nomenclature.read(record_id)['name'] == 'Болт М8'
+
+    (row,) = audit_rows(db, 'UPDATE')
+    assert row['record_id'] == record_id
+    old_values = json.loads(row['old_values'])
+    new_values = json.loads(row['new_values'])
+    assert old_values['name'] == 'Болт'
+    assert new_values['name'] == 'Болт М8'
+    assert 'unit' not in old_values and 'unit' not in new_values
+
+
+def test_update_holds_write_lock_between_read_and_write(nomenclature, db):
+    """Запись другого подключения не вклинивается между чтением и UPDATE"""
+    record_id = _create(nomenclature, '0102003004', 'Болт')
+    read = nomenclature.read
+    blocked = []
+
+    def read_then_write_elsewhere(rid):
+        row = read(rid)
+        other = sqlite3.connect(str(db.db_path), timeout=0)
+        try:
+            other.execute("UPDATE nomenclature SET price = 1 WHERE id = ?", (rid,))
+            other.commit()
+        except sqlite3.OperationalError:
+            blocked.append(True)
+        finally:
+            other.close()
+        return row
+
+    nomenclature.read = read_then_write_elsewhere
+    assert nomenclature.update(record_id, {'name': 'Болт М8'})
+    assert blocked == [True]
+    assert read(record_id)['name'] == 'Болт М8'
+
+
+def test_update_without_audit_query_is_cached(db):
+    """Текст UPDATE ... RETURNING строится один раз на набор колонок"""
+    model = Nomenclature(db)
+    record_id = _create(model, '0102003004', 'Болт')
+    base._build_update.cache_clear()
+
+    model.update(record_id, {'price': 1})
+    model.update(record_id, {'price': 2})
+    info = base._build_update.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+
+
+def test_update_missing_record(nomenclature, db):
+    """Изменение несуществующей записи не пишет аудит"""
+    assert not nomenclature.update(999, {'name': 'Нет'})
+    assert not audit_rows(db, 'UPDATE')
+
+
+def test_update_without_audit_uses_returning(db):
+    """Без аудита изменение выполняется одним UPDATE ... RETURNING"""
+    model = Nomenclature(db)
+    record_id = _create(model, '0102003004', 'Болт')
+
+    assert model.update(record_id, {'price': 5})
+    assert model.read(record_id)['price'] == 5
+    assert not model.update(999, {'price': 5})
+    assert not audit_rows(db)
+
+
+def test_delete_audits_returned_row(nomenclature, db):
+    """Аудит удаления получает строку из DELETE ... RETURNING"""
+    record_id = _create(nomenclature, '0102003004', 'Болт', price=3)
+
+    assert nomenclature.delete(record_id)
+    assert nomenclature.read(record_id) is None
+    assert not nomenclature.delete(record_id)
+
+    (row,) = audit_rows(db, 'DELETE')
+    old_values = json.loads(row['old_values'])
+    assert old_values['code'] == '0102003004'
+    assert old_values['price'] == 3
+    assert row['new_values'] is None
+
+
+def test_find_list_condition_uses_json_each(nomenclature):
+    """Список значений передается одним JSON-параметром через json_each"""
+    ids = [_create(nomenclature, f'010200300{i}', f'Позиция {i}') for i in range(4)]
+
+    where, params = nomenclature._build_where({'id': ids[:3]})
+    if base._HAS_JSON_EACH:
+        assert 'json_each(?)' in where
+        assert params == (json.dumps(ids[:3]),)
+
+    found = nomenclature.find({'id': ids[:3]}, order_by='id')
+    assert [row['id'] for row in found] == ids[:3]
+
+    codes = ['0102003001', '0102003003']
+    found = nomenclature.find({'code': codes}, order_by='code')
+    assert [row['code'] for row in found] == codes
+
+
+def test_find_mixed_list_falls_back_to_placeholders(nomenclature):
+    """Список с нескалярными значениями строится через плейсхолдеры"""
+    where, params = nomenclature._build_where({'id': [1, None]})
+    assert where == " WHERE id IN (?,?)"
+    assert params == (1, None)
+
+
+def test_find_string_condition_is_equality(nomenclature):
+    """Строка - одно значение, а не список символов"""
+    _create(nomenclature, '0102003004', 'Болт')
+    where, params = nomenclature._build_where({'name': 'Болт'})
+    assert where == " WHERE name = ?"
+    assert len(nomenclature.find({'name': 'Болт'})) == 1
+
+
+def test_audit_batch_writes_on_commit(nomenclature, db):
+    """Аудит операций audit_batch() записывается перед фиксацией"""
+    with nomenclature.audit_batch():
+        for i in range(3):
+            _create(nomenclature, f'010200300{i}', f'Позиция {i}')
+        assert len(nomenclature._audit_buffer) == 3
+
+    assert not nomenclature._audit_buffer
+    assert len(audit_rows(db, 'CREATE')) == 3
+
+
+def test_audit_batch_rolls_back_data_and_audit(nomenclature, db):
+    """Ошибка в audit_batch() откатывает и данные, и аудит"""
+    with pytest.raises(ValueError):
+        with nomenclature.audit_batch():
+            _create(nomenclature, '0102003004', 'Болт')
+            raise ValueError("ошибка")
+
+    assert nomenclature.count() == 0
+    assert not nomenclature._audit_buffer
+    assert not audit_rows(db)
+
+
+def test_audit_outside_batch_is_written_immediately(nomenclature, db):
+    """Вне audit_batch() аудит пишется сразу после операции"""
+    _create(nomenclature, '0102003004', 'Болт')
+    assert not nomenclature._audit_buffer
+    assert len(audit_rows(db, 'CREATE')) == 1
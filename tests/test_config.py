@@ -0,0 +1,18 @@
+"""
+Тесты конфигурации
+"""
+from src.core.config import Config
+
+
+def test_each_config_creates_its_directories(tmp_path):
+    """Конфигурация с другими путями создает свои директории"""
+    for name in ("first", "second"):
+        data_dir = tmp_path / name
+        Config(
+            DATA_DIR=data_dir,
+            DB_PATH=data_dir / "database" / "test.db",
+            BACKUP_DIR=data_dir / "backups",
+            LOG_DIR=data_dir / "logs",
+        )
+        for path in (data_dir, data_dir / "database", data_dir / "backups", data_dir / "logs"):
+            assert path.is_dir()
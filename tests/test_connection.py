@@ -0,0 +1,141 @@
+"""
+Тесты пула подключений DatabaseConnection
+"""
+import sqlite3
+import threading
+
+import pytest
+
+
+def test_acquire_nested_returns_same_connection(db):
+    """Вложенный acquire() в том же потоке получает то же подключение"""
+    with db.acquire() as outer:
+        with db.acquire() as inner:
+            assert inner is outer
+        assert db.connection is outer
+
+    with pytest.raises(RuntimeError):
+        db.connection
+
+
+def test_acquire_returns_connection_to_pool(db):
+    """После acquire() подключение снова доступно в пуле"""
+    with db.acquire() as first:
+        pass
+    with db.acquire() as second:
+        assert second is first
+
+
+def test_release_rolls_back_open_transaction(db):
+    """Незавершенная транзакция откатывается при возврате в пул"""
+    with db.acquire() as conn:
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO departments (code, name) VALUES ('99', 'Тест')")
+
+    assert not conn.in_transaction
+    assert db.fetchone("SELECT 1 FROM departments WHERE code = '99'") is None
+
+
+def test_threads_get_separate_connections(db):
+    """Параллельные потоки получают разные подключения из пула"""
+    barrier = threading.Barrier(3)
+    seen = []
+
+    def worker():
+        with db.acquire() as conn:
+            seen.append(conn)
+            barrier.wait(timeout=5)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(conn) for conn in seen}) == 3
+    assert len(db._connections) <= db.POOL_SIZE
+
+
+def test_execute_outside_acquire_closes_cursor(db):
+    """Вне acquire() курсор закрыт, но lastrowid и rowcount доступны"""
+    cursor = db.execute("INSERT INTO departments (code, name) VALUES ('99', 'Тест')")
+    assert cursor.lastrowid
+    assert cursor.rowcount == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        cursor.fetchall()
+
+    with db.acquire():
+        cursor = db.execute("SELECT name FROM departments WHERE code = '99'")
+        assert cursor.fetchone()[0] == "Тест"
+
+
+def test_iterate_runs_query_once(db):
+    """iterate() выполняет запрос один раз и читает его пачками"""
+    expected = [f"{i:02d}" for i in range(25)]
+    db.executemany(
+        "INSERT INTO departments (code, name) VALUES (?, ?)",
+        [(code, f"Отдел {code}") for code in expected]
+    )
+
+    statements = []
+    for conn in db._connections:
+        conn.set_trace_callback(statements.append)
+
+    query = "SELECT code FROM departments ORDER BY code"
+    codes = [row['code'] for row in db.iterate(query, batch_size=10)]
+
+    assert codes == expected
+    assert statements.count(query) == 1
+    assert len(statements) == 1
+
+
+def test_iterate_releases_connection_on_close(db):
+    """Закрытый на середине генератор возвращает подключение в пул"""
+    db.executemany(
+        "INSERT INTO departments (code, name) VALUES (?, ?)",
+        [(f"{i:02d}", f"Отдел {i}") for i in range(25)]
+    )
+    free = db._pool.qsize()
+
+    rows = db.iterate("SELECT code FROM departments ORDER BY code", batch_size=10)
+    next(rows)
+    assert db._pool.qsize() == free - 1
+    # Подключение занято генератором, но за потоком не закреплено
+    assert getattr(db._local, 'connection', None) is None
+
+    rows.close()
+    assert db._pool.qsize() == free
+
+
+def test_transaction_rolls_back_on_error(db):
+    """Ошибка в transaction() откатывает все изменения блока"""
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.execute("INSERT INTO departments (code, name) VALUES ('99', 'Тест')")
+            raise ValueError("ошибка")
+
+    assert db.fetchone("SELECT 1 FROM departments WHERE code = '99'") is None
+
+
+def test_nested_transaction_commits_with_outer(db):
+    """Вложенный transaction() фиксируется вместе с внешним блоком"""
+    with pytest.raises(ValueError):
+        with db.transaction():
+            with db.transaction():
+                db.execute("INSERT INTO departments (code, name) VALUES ('99', 'Тест')")
+            raise ValueError("ошибка")
+
+    assert db.fetchone("SELECT 1 FROM departments WHERE code = '99'") is None
+
+
+def test_immediate_transaction_takes_write_lock(db):
+    """transaction(immediate=True) блокирует запись других подключений сразу"""
+    other = sqlite3.connect(str(db.db_path), timeout=0)
+    try:
+        with db.transaction(immediate=True):
+            with pytest.raises(sqlite3.OperationalError):
+                other.execute("INSERT INTO departments (code, name) VALUES ('98', 'Другой')")
+        other.execute("INSERT INTO departments (code, name) VALUES ('98', 'Другой')")
+        other.commit()
+    finally:
+        other.close()
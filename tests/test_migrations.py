@@ -0,0 +1,38 @@
+"""
+Тесты системы миграций
+"""
+import pytest
+
+from src.database.migrations import Migration
+
+
+def test_all_migrations_applied(db):
+    """Новая БД получает все миграции по одному разу"""
+    migration = Migration(db)
+    versions = [version for version, _, _ in migration._get_all_migrations()]
+    assert migration.get_applied_migrations() == versions
+
+    # Повторный запуск ничего не применяет
+    migration.run_all()
+    assert migration.get_applied_migrations() == versions
+
+
+def test_failed_migration_rolls_back(db):
+    """Ошибка в середине миграции откатывает все ее шаги"""
+    migration = Migration(db)
+    sql = """
+        CREATE TABLE broken (id INTEGER PRIMARY KEY);
+        INSERT INTO broken (id) VALUES (1);
+        INSERT INTO missing_table (id) VALUES (1);
+    """
+    with pytest.raises(Exception):
+        migration.apply_migration(100, "broken", sql)
+
+    assert 100 not in migration.get_applied_migrations()
+    assert db.fetchone(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'broken'"
+    ) is None
+
+    # Подключение вернулось в пул без открытой транзакции
+    with db.acquire() as conn:
+        assert not conn.in_transaction
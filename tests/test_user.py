@@ -0,0 +1,110 @@
+"""
+Тесты моделей пользователя и ролей
+"""
+from src.core.config import Config
+from src.core.security import PasswordManager
+from src.models.user import Role, User
+
+
+def test_role_permissions_cached(db):
+    """Права роли читаются из БД один раз"""
+    role = Role(db)
+    assert role.get_permissions(2)['can_delete'] == 0
+
+    # Изменение в обход модели кеш не сбрасывает
+    db.execute("UPDATE roles SET can_delete = 1 WHERE id = 2")
+    assert role.get_permissions(2)['can_delete'] == 0
+
+
+def test_role_invalidate_permissions(db):
+    """После сброса кеша права читаются из БД заново"""
+    role = Role(db)
+    assert role.get_permissions(2)['can_delete'] == 0
+
+    db.execute("UPDATE roles SET can_delete = 1 WHERE id = 2")
+    role.invalidate_permissions(2)
+    assert role.get_permissions(2)['can_delete'] == 1
+
+    # Кеш общий для всех экземпляров модели
+    assert Role(db).get_permissions(2)['can_delete'] == 1
+
+
+def test_role_delete_invalidates_permissions(db):
+    """Удаление роли через модель сбрасывает кеш прав"""
+    role = Role(db)
+    assert role.get_permissions(4)
+    assert role.delete(4)
+    assert role.get_permissions(4) == {}
+
+
+def _create_operator(db):
+    """Создать пользователя с ролью оператора"""
+    user_id = User(db).create_user('operator', 'Secret#123', 'Оператор', 'Кладовщик', 2)
+    assert user_id
+    return user_id
+
+
+def test_authenticate(db):
+    """Вход по верному паролю возвращает пользователя с правами роли"""
+    user_id = _create_operator(db)
+
+    user = User(db).authenticate('operator', 'Secret#123')
+    assert user['id'] == user_id
+    assert user['role_name'] == 'Оператор'
+    assert user['can_write'] == 1 and user['can_admin'] == 0
+    assert User(db).read(user_id)['last_login_at'] is not None
+
+
+def test_authenticate_wrong_password(db):
+    """Неверный пароль отклоняется"""
+    _create_operator(db)
+    assert User(db).authenticate('operator', 'wrong') is None
+
+
+def test_authenticate_unknown_user_checks_dummy_hash(db, monkeypatch):
+    """Для неизвестного имени пароль проверяется по хешу-заглушке"""
+    checked = []
+    verify = PasswordManager.verify_password
+
+    def spy(password, hashed):
+        checked.append(hashed)
+        return verify(password, hashed)
+
+    monkeypatch.setattr(PasswordManager, 'verify_password', staticmethod(spy))
+
+    model = User(db)
+    assert model.authenticate('nobody', 'admin') is None
+    assert checked == [model._dummy_hash()]
+
+
+def test_dummy_hash_uses_configured_rounds(db):
+    """Заглушка строится один раз со стоимостью Config.BCRYPT_ROUNDS"""
+    model = User(db)
+    model.prepare_dummy_hash()
+    hashed = model._dummy_hash()
+    assert not PasswordManager.needs_rehash(hashed, Config.BCRYPT_ROUNDS)
+    assert User(db)._dummy_hash() is hashed
+
+
+def test_authenticate_rehashes_other_cost(db):
+    """Хеш с другой стоимостью пересчитывается при успешном входе"""
+    user_id = _create_operator(db)
+    old_hash = PasswordManager.hash_password('Secret#123', 4)
+    db.execute("UPDATE users SET password_hash = ? WHERE id = ?", (old_hash, user_id))
+
+    assert User(db).authenticate('operator', 'Secret#123')
+    new_hash = User(db).read(user_id)['password_hash']
+    assert new_hash != old_hash
+    assert not PasswordManager.needs_rehash(new_hash, Config.BCRYPT_ROUNDS)
+    assert PasswordManager.verify_password('Secret#123', new_hash)
+
+    # Хеш с нужной стоимостью не пересчитывается
+    assert User(db).authenticate('operator', 'Secret#123')
+    assert User(db).read(user_id)['password_hash'] == new_hash
+
+
+def test_needs_rehash():
+    """Стоимость читается из префикса хеша"""
+    assert not PasswordManager.needs_rehash('$2b$10$' + 'x' * 53, 10)
+    assert PasswordManager.needs_rehash('$2b$12$' + 'x' * 53, 10)
+    assert PasswordManager.needs_rehash('plain', 10)